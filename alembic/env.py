@@ -90,6 +90,11 @@ async def run_async_migrations() -> None:
 
 def run_migrations_online() -> None:
     """Run migrations in 'online' mode."""
+    # Callers (e.g. tests) may hand over an open sync connection
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        do_run_migrations(connection)
+        return
 
     asyncio.run(run_async_migrations())
 
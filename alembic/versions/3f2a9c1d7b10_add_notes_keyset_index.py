@@ -0,0 +1,31 @@
+"""add notes keyset pagination index
+
+Revision ID: 3f2a9c1d7b10
+Revises: 1b7e4a2c9d05
+Create Date: 2026-10-16 09:12:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f2a9c1d7b10'
+down_revision = '1b7e4a2c9d05'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Build the index without blocking writes on large notes tables
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_notes_user_id_updated_at_id',
+            'notes',
+            ['user_id', sa.text('updated_at DESC'), sa.text('id DESC')],
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_notes_user_id_updated_at_id', table_name='notes')
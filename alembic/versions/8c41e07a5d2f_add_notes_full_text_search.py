@@ -0,0 +1,44 @@
+"""add notes full-text search vector
+
+Revision ID: 8c41e07a5d2f
+Revises: 3f2a9c1d7b10
+Create Date: 2026-10-16 10:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c41e07a5d2f'
+down_revision = '3f2a9c1d7b10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # SQLite and other dialects use the ILIKE fallback in src/search.py
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    # Adding a STORED generated column rewrites the table, which backfills the
+    # vector for every existing note; PostgreSQL keeps it in sync afterwards.
+    op.execute(
+        "ALTER TABLE notes ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ("
+        "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+        "setweight(to_tsvector('simple', coalesce(content, '')), 'B')"
+        ") STORED"
+    )
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_notes_search_vector "
+            "ON notes USING GIN (search_vector)"
+        )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute("DROP INDEX IF EXISTS ix_notes_search_vector")
+    op.execute("ALTER TABLE notes DROP COLUMN IF EXISTS search_vector")
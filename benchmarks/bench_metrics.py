@@ -0,0 +1,71 @@
+"""
+Benchmark: per-request overhead of MetricsMiddleware
+
+Calls a trivial ASGI app directly (no HTTP, no FastAPI routing) with and
+without the middleware, so the difference is the cost of recording the
+in-flight gauge, the status counter and the latency histogram.
+
+Usage: python -m benchmarks.bench_metrics [iterations]
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+# Settings are required at import time; benchmarks don't need a real database
+os.environ.setdefault("DATABASE", "sqlite+aiosqlite:///./bench.db")
+os.environ.setdefault("PORT", "80")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+os.environ.setdefault("ENVIRONMENT", "benchmark")
+
+from src.metrics import MetricsMiddleware, registry  # noqa: E402
+
+
+class Route:
+    path = "/notes/{note_id}"
+
+
+async def endpoint(scope, receive, send):
+    scope["route"] = Route
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def receive():
+    return {"type": "http.request", "body": b""}
+
+
+async def send(message):
+    pass
+
+
+async def time_app(app, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        await app({"type": "http", "method": "GET", "path": "/notes/1"}, receive, send)
+    return (time.perf_counter() - started) / iterations
+
+
+async def measure(iterations: int):
+    middleware = MetricsMiddleware(endpoint)
+    # Best of several rounds to reduce noise
+    bare = min([await time_app(endpoint, iterations) for _ in range(5)])
+    instrumented = min([await time_app(middleware, iterations) for _ in range(5)])
+    return bare, instrumented
+
+
+def main(iterations: int = 100000) -> None:
+    bare, instrumented = asyncio.run(measure(iterations))
+    started = time.perf_counter()
+    body = registry.render()
+    render_ms = (time.perf_counter() - started) * 1000
+
+    print(f"bare ASGI app:          {bare * 1e6:8.2f} us/request")
+    print(f"with MetricsMiddleware: {instrumented * 1e6:8.2f} us/request")
+    print(f"overhead:               {(instrumented - bare) * 1e6:8.2f} us/request")
+    print(f"scrape render:          {render_ms:8.3f} ms ({len(body)} bytes)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,90 @@
+"""
+Benchmark: per-page serialization time for a 100-item note list page
+
+Compares FastAPI's default path (ORM objects -> response_model validation ->
+jsonable_encoder -> JSONResponse) with the tuple-based paths used by
+GET /notes/ (pydantic models, and the precompiled fast path).
+
+Usage: python -m benchmarks.bench_serialization [iterations]
+"""
+
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+# Settings are required at import time; benchmarks don't need a real database
+os.environ.setdefault("DATABASE", "sqlite+aiosqlite:///./bench.db")
+os.environ.setdefault("PORT", "80")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+os.environ.setdefault("ENVIRONMENT", "benchmark")
+
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+from fastapi.utils import create_response_field  # noqa: E402
+
+from src.database import Note  # noqa: E402
+from src.schemas import NoteListItem, PaginatedResponse  # noqa: E402
+from src.serialization import compile_serializer, field_names, render_json  # noqa: E402
+
+PAGE_SIZE = 100
+
+
+def make_rows():
+    now = datetime(2024, 5, 1, 12, 0, 0, 123456)
+    content = "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 8
+    return [
+        (f"Note {i}", content, i, 1, now - timedelta(days=i), now - timedelta(minutes=i), None, None)
+        for i in range(PAGE_SIZE)
+    ]
+
+
+async def time_fastapi_default(rows, iterations):
+    field = create_response_field(name="Response_get_notes", type_=PaginatedResponse)
+    notes = [Note(**dict(zip(field_names(NoteListItem)[:6], row[:6]))) for row in rows]
+    started = time.perf_counter()
+    for _ in range(iterations):
+        content = await serialize_response(
+            field=field,
+            response_content=PaginatedResponse(items=notes, total=1000, page=1, limit=PAGE_SIZE, pages=10),
+        )
+        body = JSONResponse(content).body
+    return (time.perf_counter() - started) / iterations, body
+
+
+def time_models(rows, iterations):
+    names = field_names(NoteListItem)
+    started = time.perf_counter()
+    for _ in range(iterations):
+        model = PaginatedResponse(
+            items=[NoteListItem(**dict(zip(names, row))) for row in rows],
+            total=1000, page=1, limit=PAGE_SIZE, pages=10
+        )
+        body = render_json(model.model_dump(mode="json"))
+    return (time.perf_counter() - started) / iterations, body
+
+
+def time_fast(rows, iterations):
+    serializer = compile_serializer(PaginatedResponse)
+    started = time.perf_counter()
+    for _ in range(iterations):
+        body = serializer((rows, 1000, 1, PAGE_SIZE, 10, None)).encode()
+    return (time.perf_counter() - started) / iterations, body
+
+
+def main(iterations: int = 500) -> None:
+    rows = make_rows()
+    baseline, baseline_body = asyncio.run(time_fastapi_default(rows, iterations))
+    models, models_body = time_models(rows, iterations)
+    fast, fast_body = time_fast(rows, iterations)
+
+    print(f"page of {PAGE_SIZE} notes, {len(fast_body)} bytes")
+    print(f"FastAPI default (ORM + response_model): {baseline * 1000:8.3f} ms/page")
+    print(f"tuples + pydantic models:               {models * 1000:8.3f} ms/page")
+    print(f"precompiled fast path:                  {fast * 1000:8.3f} ms/page ({baseline / fast:.1f}x)")
+    print(f"identical JSON: {baseline_body == models_body == fast_body}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
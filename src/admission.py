@@ -0,0 +1,82 @@
+"""
+Pool-aware admission control
+
+``AdmissionMiddleware`` sheds load before it reaches the database: while a
+worker has ``max_in_flight`` requests open, or recent connection checkouts on
+the primary pool waited ``max_pool_wait_ms`` on average, new requests get an
+immediate 503 with ``Retry-After`` instead of queueing on the pool until
+timeouts cascade. Probe and metrics paths are never shed. The pool signal
+expires after ``retry_after`` seconds without a checkout, so admission resumes
+and re-measures once the backlog drains.
+"""
+
+from typing import Iterable, Optional
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from .metrics import Counter, registry
+from .pool import PoolMonitor
+
+requests_shed_total = registry.register(Counter(
+    "http_requests_shed_total", "Requests rejected with 503 by admission control", ("reason",)
+))
+
+
+class AdmissionMiddleware:
+    """Reject requests with 503 while the worker or its connection pool is overloaded"""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        pool_monitor: Optional[PoolMonitor] = None,
+        max_in_flight: int = 0,
+        max_pool_wait_ms: float = 0.0,
+        retry_after: int = 1,
+        exempt_paths: Iterable[str] = ()
+    ):
+        self.app = app
+        self.pool_monitor = pool_monitor
+        self.max_in_flight = max_in_flight
+        self.max_pool_wait = max_pool_wait_ms / 1000
+        self.retry_after = retry_after
+        self.exempt_paths = frozenset(exempt_paths)
+        self.in_flight = 0
+
+    def _overloaded(self) -> Optional[str]:
+        """Reason to shed the next request, or None to admit it"""
+        if self.max_in_flight > 0 and self.in_flight >= self.max_in_flight:
+            return "in_flight"
+        if (
+            self.max_pool_wait > 0
+            and self.pool_monitor is not None
+            and self.pool_monitor.recent_wait(self.retry_after) >= self.max_pool_wait
+        ):
+            return "pool_wait"
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.exempt_paths:
+            await self.app(scope, receive, send)
+            return
+
+        reason = self._overloaded()
+        if reason is not None:
+            requests_shed_total.inc(reason)
+            body = b'{"detail":"Service overloaded, retry later"}'
+            await send({
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", str(self.retry_after).encode()),
+                ],
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        self.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
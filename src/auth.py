@@ -3,43 +3,60 @@ Authentication utilities
 """
 
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Dict, Optional
 from jose import JWTError, jwt
 import hashlib
-import secrets
+import time
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import event, inspect, select
 
+from .cache import TTLCache
 from .config import settings
 from .database import get_db, User
+from .passwords import HasherBusy, PasswordHasher, get_password_hash, verify_password  # noqa: F401 (re-exported)
 from .schemas import TokenData
 
 # JWT token scheme
 security = HTTPBearer()
 
+# Users resolved from a token `sub`, so authenticated requests skip the lookup query.
+# Holds detached User instances; changes made through the ORM invalidate them, anything
+# else (raw SQL, other processes) is bounded by the TTL.
+principal_cache = TTLCache(
+    max_size=settings.principal_cache_max_size,
+    ttl=settings.principal_cache_ttl_seconds
+)
+
+# Verified JWT payloads keyed by a SHA-256 digest of the raw token. Only a byte-identical
+# token can hit, so a hit implies the signature was already checked.
+token_cache = TTLCache(
+    max_size=settings.token_cache_max_size,
+    ttl=settings.token_cache_ttl_seconds
+)
+
+# PBKDF2 runs on this pool so logins never block the event loop
+password_hasher = PasswordHasher(
+    kind=settings.password_hash_executor,
+    workers=settings.password_hash_workers,
+    max_pending=settings.password_hash_max_pending
+)
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a password against its hash"""
-    try:
-        # Split the stored hash to get salt and hash
-        salt, stored_hash = hashed_password.split(':')
-        # Hash the provided password with the same salt
-        password_hash = hashlib.pbkdf2_hmac('sha256', plain_password.encode(), salt.encode(), 100000)
-        return password_hash.hex() == stored_hash
-    except ValueError:
-        return False
 
+def invalidate_principal(username: str) -> None:
+    """Drop a cached principal, e.g. after the user was changed or deactivated"""
+    principal_cache.pop(username)
 
-def get_password_hash(password: str) -> str:
-    """Hash a password using PBKDF2"""
-    # Generate a random salt
-    salt = secrets.token_hex(16)
-    # Hash the password with the salt
-    password_hash = hashlib.pbkdf2_hmac('sha256', password.encode(), salt.encode(), 100000)
-    # Return salt:hash format
-    return f"{salt}:{password_hash.hex()}"
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_changed_user(mapper, connection, target: User) -> None:
+    """Invalidate cache entries for users modified through the ORM"""
+    invalidate_principal(target.username)
+    # A renamed user must not stay reachable under the old name
+    for old_username in inspect(target).attrs.username.history.deleted or ():
+        invalidate_principal(old_username)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
@@ -55,18 +72,49 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 
+def decode_access_token(token: str) -> Dict[str, Any]:
+    """Verify a JWT and return its claims, memoized until the token expires"""
+    key = hashlib.sha256(token.encode()).digest()
+    payload = token_cache.get(key)
+    if payload is None:
+        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+        exp = payload.get("exp")
+        token_cache.set(key, payload, ttl=exp - time.time() if exp is not None else None)
+    return payload
+
+
 async def get_user_by_username(db: AsyncSession, username: str) -> Optional[User]:
     """Get user by username"""
     result = await db.execute(select(User).where(User.username == username))
     return result.scalar_one_or_none()
 
 
+def _hasher_busy_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many concurrent authentication requests",
+        headers={"Retry-After": "1"},
+    )
+
+
+async def hash_password(password: str) -> str:
+    """Hash a password on the worker pool"""
+    try:
+        return await password_hasher.hash(password)
+    except HasherBusy:
+        raise _hasher_busy_exception()
+
+
 async def authenticate_user(db: AsyncSession, username: str, password: str) -> Optional[User]:
     """Authenticate user with username and password"""
     user = await get_user_by_username(db, username)
     if not user:
         return None
-    if not verify_password(password, user.hashed_password):
+    try:
+        password_ok = await password_hasher.verify(password, user.hashed_password)
+    except HasherBusy:
+        raise _hasher_busy_exception()
+    if not password_ok:
         return None
     return user
 
@@ -84,17 +132,20 @@ async def get_current_user(
     
     try:
         token = credentials.credentials
-        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
-        username: str = payload.get("sub")
+        payload = decode_access_token(token)
+        username: Optional[str] = payload.get("sub")
         if username is None:
             raise credentials_exception
         token_data = TokenData(username=username)
     except JWTError:
         raise credentials_exception
     
-    user = await get_user_by_username(db, username=token_data.username)
+    user = principal_cache.get(token_data.username)
     if user is None:
-        raise credentials_exception
+        user = await get_user_by_username(db, username=token_data.username)
+        if user is None:
+            raise credentials_exception
+        principal_cache.set(token_data.username, user)
     
     return user
 
@@ -0,0 +1,42 @@
+"""
+Boot timing: seconds from application import to startup and first request
+
+Import this module before anything heavy so ``STARTED`` marks the beginning of
+the application import.
+"""
+
+import time
+from typing import Dict
+
+import structlog
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+STARTED = time.perf_counter()
+
+logger = structlog.get_logger()
+
+# phase -> seconds since STARTED, recorded once per process
+phases: Dict[str, float] = {}
+
+
+def mark(phase: str) -> None:
+    """Record the first time ``phase`` is reached"""
+    if phase not in phases:
+        phases[phase] = round(time.perf_counter() - STARTED, 6)
+        logger.info("Boot phase reached", phase=phase, seconds=phases[phase])
+
+
+class FirstRequestMiddleware:
+    """Mark the ``first_request`` phase once the first HTTP request has been served"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or "first_request" in phases:
+            await self.app(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            mark("first_request")
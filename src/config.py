@@ -12,15 +12,107 @@ class Settings(BaseSettings):
     # Database - REQUIRED
     database: str
     
+    # Connection pool (PostgreSQL; SQLite keeps the dialect's default pool)
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30.0
+    db_pool_recycle: int = 1800  # seconds, -1 disables
+    db_pool_pre_ping: bool = True
+    db_statement_cache_size: int = 100  # 0 when running behind pgbouncer in transaction mode
+    db_pool_slow_checkout_ms: float = 100.0
+    
+    # Read replicas: comma-separated DSNs; empty sends every read to the primary
+    database_replicas: str = ""
+    replica_eject_seconds: float = 30.0
+    replica_pin_seconds: float = 5.0  # reads stay on the primary this long after a user writes
+    
+    # Per-user cache of note list pages: "memory" or "redis" (0 TTL disables it)
+    response_cache_backend: str = "memory"
+    response_cache_url: str = ""
+    response_cache_ttl_seconds: float = 60.0
+    response_cache_max_entries: int = 10000
+    
+    # Concurrent identical note reads (same user and parameters) share one execution
+    read_coalescing: bool = True
+    
+    # Encode note responses straight from row tuples with precompiled serializers
+    fast_serialization: bool = False
+    
+    # Response compression (brotli/gzip) for bodies of at least this many bytes
+    compression_enabled: bool = True
+    compression_minimum_size: int = 1024
+    gzip_compress_level: int = 6
+    brotli_quality: int = 4
+    
+    # Prometheus metrics at /metrics (request, query, pool and cache metrics)
+    metrics_enabled: bool = True
+    
+    # Per-request SQL stats: Server-Timing header and slow-query log (0 disables the log)
+    server_timing: bool = True
+    slow_query_ms: float = 200.0
+    
+    # On-demand cProfile of requests (X-Profile: <token> header or sampling); off by default
+    profiling_enabled: bool = False
+    profiling_token: str = ""
+    profiling_sample_rate: float = 0.0
+    profiling_output_dir: str = "./profiles"
+    
+    # Schema handling at startup: "create" (create_all), "check" (verify the
+    # Alembic version and fail fast) or "skip"
+    schema_startup: str = "create"
+    
     # Server - REQUIRED
     port: int
     host: str = "0.0.0.0"
     
+    # Token-bucket rate limits: per authenticated user on note routes and per
+    # client IP on /auth ("memory" backend is per worker; 0 rate disables a limit)
+    rate_limit_backend: str = "memory"
+    rate_limit_url: str = ""
+    rate_limit_user_rate: float = 20.0  # requests per second
+    rate_limit_user_burst: int = 40
+    rate_limit_auth_ip_rate: float = 0.5
+    rate_limit_auth_ip_burst: int = 10
+    # Proxies trusted for X-Forwarded-For/-Proto (comma-separated IPs, "*"
+    # trusts any); behind a load balancer not listed here every client shares its IP
+    forwarded_allow_ips: str = "127.0.0.1"
+    
+    # Load shedding: 503 + Retry-After while a worker has this many requests in
+    # flight or recent pool checkouts wait this long on average (0 disables each)
+    admission_max_in_flight: int = 256
+    admission_max_pool_wait_ms: float = 500.0
+    admission_retry_after_seconds: int = 1
+    
+    # Background health checks behind /readyz: how often to ping the database,
+    # how long a ping may take, and the pool saturation (0-1) that counts as not ready
+    health_check_interval_seconds: float = 5.0
+    health_check_timeout_seconds: float = 2.0
+    readiness_max_pool_saturation: float = 1.0
+    
+    # Launcher (python -m src.server): worker processes (0 = one per CPU), seconds
+    # to let in-flight requests finish on shutdown, then to wait for DB connections
+    workers: int = 0
+    graceful_shutdown_seconds: int = 30  # uvicorn takes whole seconds
+    db_drain_seconds: float = 10.0
+    
     # Security - REQUIRED
     secret_key: str
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 1440  # 24 hours
     
+    # Authenticated-principal cache (0 disables it)
+    principal_cache_ttl_seconds: float = 30.0
+    principal_cache_max_size: int = 10000
+    
+    # Verified-token cache; entries never outlive the token's exp (0 disables it)
+    token_cache_ttl_seconds: float = 300.0
+    token_cache_max_size: int = 10000
+    
+    # Password hashing pool: "thread" or "process", 0 workers means one per CPU
+    password_hash_executor: str = "thread"
+    password_hash_workers: int = 2
+    password_hash_max_pending: int = 64
+    
     # Environment - REQUIRED
     environment: str
     debug: bool = True
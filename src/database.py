@@ -2,13 +2,20 @@
 Database configuration and models
 """
 
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+import asyncio
+import time
+import structlog
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
-from sqlalchemy import String, Text, DateTime, Integer, ForeignKey
+from sqlalchemy import String, Text, DateTime, Integer, ForeignKey, Index, DDL, event, exc, text
 from datetime import datetime
 from typing import Optional
 
 from .config import settings
+from .query_stats import instrument_engine
+from .pool import MonitoredQueuePool, PoolMonitor
+
+logger = structlog.get_logger()
 
 # Create async engine
 def convert_database_url(url: str) -> str:
@@ -24,20 +31,85 @@ def convert_database_url(url: str) -> str:
     
     return url
 
-engine = create_async_engine(
-    convert_database_url(settings.database),
-    echo=False,  # Disabled debug logs
-    future=True
-)
 
-# Create session factory
-AsyncSessionLocal = async_sessionmaker(
-    engine,
+def engine_options(url: str) -> dict:
+    """Pool and driver options for create_async_engine"""
+    if not url.startswith("postgresql+asyncpg://"):
+        return {}
+    
+    return {
+        "poolclass": MonitoredQueuePool,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+        "connect_args": {
+            # asyncpg's own statement cache and SQLAlchemy's prepared statement cache
+            "statement_cache_size": settings.db_statement_cache_size,
+            "prepared_statement_cache_size": settings.db_statement_cache_size,
+        },
+    }
+
+
+database_url = convert_database_url(settings.database)
+
+# Each process builds its own engine on first use, so pooled connections are
+# never inherited across fork; see get_engine() and dispose_engine().
+engine: Optional[AsyncEngine] = None
+
+pool_monitor = PoolMonitor("primary", slow_checkout_ms=settings.db_pool_slow_checkout_ms)
+
+
+class _ProcessSessionMaker(async_sessionmaker):
+    """Session factory that binds to this process's engine on first use"""
+    
+    def __call__(self, **local_kw) -> AsyncSession:
+        get_engine()
+        return super().__call__(**local_kw)
+
+
+# Create session factory (bound to the engine by get_engine)
+AsyncSessionLocal = _ProcessSessionMaker(
     class_=AsyncSession,
     expire_on_commit=False
 )
 
 
+def get_engine() -> AsyncEngine:
+    """This process's engine, created on first use"""
+    global engine
+    if engine is None:
+        engine = create_async_engine(
+            database_url,
+            echo=False,  # Disabled debug logs
+            future=True,
+            **engine_options(database_url)
+        )
+        pool_monitor.attach(engine)
+        instrument_engine(engine, "primary")
+        AsyncSessionLocal.configure(bind=engine)
+    return engine
+
+
+async def dispose_engine(drain_timeout: float = 10.0) -> None:
+    """Wait up to drain_timeout for checked-out connections to return, then close the pool"""
+    global engine
+    if engine is None:
+        return
+    
+    pool = engine.sync_engine.pool
+    checked_out = getattr(pool, "checkedout", lambda: 0)
+    deadline = time.monotonic() + drain_timeout
+    while checked_out() > 0 and time.monotonic() < deadline:
+        await asyncio.sleep(0.05)
+    if checked_out() > 0:
+        logger.warning("Closing database pool with connections still in use", in_use=checked_out())
+    
+    await engine.dispose()
+    engine = None
+
+
 class Base(DeclarativeBase):
     """Base class for all models"""
     pass
@@ -68,12 +140,60 @@ class Note(Base):
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 
+# Covering index for listing a user's notes newest first (keyset pagination)
+Index(
+    "ix_notes_user_id_updated_at_id",
+    Note.user_id,
+    Note.updated_at.desc(),
+    Note.id.desc(),
+)
+
+# PostgreSQL full-text search: generated tsvector column + GIN index (see src/search.py).
+# Not mapped on the model so the schema stays portable to SQLite.
+NOTES_SEARCH_VECTOR_DDL = (
+    "ALTER TABLE notes ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(content, '')), 'B')"
+    ") STORED"
+)
+NOTES_SEARCH_INDEX_DDL = "CREATE INDEX ix_notes_search_vector ON notes USING GIN (search_vector)"
+
+event.listen(Note.__table__, "after_create", DDL(NOTES_SEARCH_VECTOR_DDL).execute_if(dialect="postgresql"))
+event.listen(Note.__table__, "after_create", DDL(NOTES_SEARCH_INDEX_DDL).execute_if(dialect="postgresql"))
+
+
+# Alembic head this code expects; bump it together with every new migration
+SCHEMA_VERSION = "8c41e07a5d2f"
+
+
+class SchemaVersionMismatch(RuntimeError):
+    """Raised at startup when the database is not migrated to SCHEMA_VERSION"""
+
+
 async def create_tables():
     """Create all database tables"""
-    async with engine.begin() as conn:
+    async with get_engine().begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
 
 
+async def check_schema_version(bind=None) -> str:
+    """Fail fast unless the database is at SCHEMA_VERSION; a single query, no catalog scans"""
+    async with (bind or get_engine()).connect() as conn:
+        try:
+            versions = (await conn.execute(text("SELECT version_num FROM alembic_version"))).scalars().all()
+        except exc.DBAPIError as error:
+            raise SchemaVersionMismatch(
+                "Database has no alembic_version table; run `alembic upgrade head`"
+            ) from error
+    
+    if versions != [SCHEMA_VERSION]:
+        raise SchemaVersionMismatch(
+            f"Database schema is at {', '.join(versions) or 'no revision'} but this build expects "
+            f"{SCHEMA_VERSION}; run `alembic upgrade head`"
+        )
+    return SCHEMA_VERSION
+
+
 async def get_db() -> AsyncSession:
     """Dependency to get database session"""
     async with AsyncSessionLocal() as session:
@@ -0,0 +1,238 @@
+"""
+Response content negotiation and compression
+
+``ResponseEncodingMiddleware`` re-encodes JSON responses as MessagePack for
+clients that ask for ``application/msgpack`` (same schema, different wire
+format) and compresses bodies above a size threshold with brotli or gzip,
+following ``Accept-Encoding``. Streaming responses are compressed on the fly.
+A strong ETag gets a suffix per transformation (``"…-mp-gz"``), so each
+representation has its own validator.
+Both codecs are optional: without ``msgpack``/``brotli`` installed the
+corresponding format is simply never negotiated.
+"""
+
+import json
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .etags import representation_etag
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+MSGPACK_MEDIA_TYPES = (MSGPACK_MEDIA_TYPE, "application/x-msgpack")
+
+
+def _qualities(header: str) -> Dict[str, float]:
+    """Parse an Accept-style header into {value: q}"""
+    qualities: Dict[str, float] = {}
+    for part in header.split(","):
+        value, _, params = part.partition(";")
+        value = value.strip().lower()
+        if not value:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, raw = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(raw)
+                except ValueError:
+                    quality = 0.0
+        qualities[value] = quality
+    return qualities
+
+
+def wants_msgpack(accept: Optional[str]) -> bool:
+    """True when the client explicitly prefers MessagePack over JSON"""
+    if msgpack is None or not accept:
+        return False
+    qualities = _qualities(accept)
+    quality = max(qualities.get(media_type, 0.0) for media_type in MSGPACK_MEDIA_TYPES)
+    return quality > 0 and quality >= qualities.get("application/json", 0.0)
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Best supported content coding for an Accept-Encoding header (brotli wins ties)"""
+    if not accept_encoding:
+        return None
+    qualities = _qualities(accept_encoding)
+    wildcard = qualities.get("*", 0.0)
+    candidates = ["br", "gzip"] if brotli is not None else ["gzip"]
+    best = max(candidates, key=lambda coding: qualities.get(coding, wildcard))
+    return best if qualities.get(best, wildcard) > 0 else None
+
+
+def _add_vary(headers: MutableHeaders, value: str) -> None:
+    vary = headers.get("vary")
+    if not vary:
+        headers["Vary"] = value
+    elif value.lower() not in vary.lower():
+        headers["Vary"] = f"{vary}, {value}"
+
+
+class _Compressor:
+    """Incremental brotli/gzip compressor; each chunk is flushed so streams stay live"""
+
+    def __init__(self, coding: str, gzip_level: int, brotli_quality: int):
+        self.coding = coding
+        if coding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+        else:
+            # wbits=31 selects the gzip container
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        if self.coding == "br":
+            output = self._brotli.process(data)
+            return output + (self._brotli.finish() if final else self._brotli.flush())
+        output = self._zlib.compress(data)
+        return output + self._zlib.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class ResponseEncodingMiddleware:
+    """ASGI middleware for MessagePack negotiation and response compression"""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        msgpack_paths: Tuple[str, ...] = ("/notes",),
+        compress: bool = True
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.msgpack_paths = msgpack_paths
+        self.compress = compress
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        negotiable = scope["path"].startswith(self.msgpack_paths)
+        to_msgpack = negotiable and wants_msgpack(headers.get("accept"))
+        coding = choose_encoding(headers.get("accept-encoding")) if self.compress else None
+        if not to_msgpack and coding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _EncodingResponder(self, send, negotiable, to_msgpack, coding, headers.get("if-none-match"))
+        await self.app(scope, receive, responder.send)
+
+    def compressor(self, coding: str) -> _Compressor:
+        return _Compressor(coding, self.gzip_level, self.brotli_quality)
+
+
+class _EncodingResponder:
+    """Holds back http.response.start until the first body chunk shows what to do"""
+
+    def __init__(
+        self,
+        middleware: ResponseEncodingMiddleware,
+        send: Send,
+        negotiable: bool,
+        to_msgpack: bool,
+        coding: Optional[str],
+        if_none_match: Optional[str] = None
+    ):
+        self.middleware = middleware
+        self._send = send
+        self.negotiable = negotiable
+        self.to_msgpack = to_msgpack
+        self.coding = coding
+        self.if_none_match = if_none_match or ""
+        self.start: Optional[Message] = None
+        self.compressor: Optional[_Compressor] = None
+        # Applied to the body, in order: "msgpack", then a content coding
+        self.transformations: List[str] = []
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start = message
+            return
+        if message["type"] != "http.response.body":
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.start is not None:
+            start, self.start = self.start, None
+            headers = MutableHeaders(raw=list(start["headers"]))
+            if self.negotiable:
+                _add_vary(headers, "Accept")
+            if more_body:
+                self._start_stream(headers)
+            else:
+                body = self._encode(headers, body)
+            self._tag_representation(headers, start["status"])
+            await self._send({**start, "headers": headers.raw})
+
+        if self.compressor is not None:
+            body = self.compressor.compress(body, final=not more_body)
+        await self._send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+    def _start_stream(self, headers: MutableHeaders) -> None:
+        if self.coding is None or "content-encoding" in headers:
+            return
+        self.compressor = self.middleware.compressor(self.coding)
+        self.transformations.append(self.coding)
+        headers["Content-Encoding"] = self.coding
+        _add_vary(headers, "Accept-Encoding")
+        if "content-length" in headers:
+            del headers["content-length"]
+
+    def _encode(self, headers: MutableHeaders, body: bytes) -> bytes:
+        """Transcode and/or compress a complete body, fixing up the headers"""
+        content_type = headers.get("content-type", "")
+        if self.to_msgpack and body and content_type.startswith("application/json"):
+            body = msgpack.packb(json.loads(body), use_bin_type=True)
+            self.transformations.append("msgpack")
+            headers["Content-Type"] = MSGPACK_MEDIA_TYPE
+
+        if (
+            self.coding is not None
+            and len(body) >= self.middleware.minimum_size
+            and "content-encoding" not in headers
+        ):
+            body = self.middleware.compressor(self.coding).compress(body, final=True)
+            self.transformations.append(self.coding)
+            headers["Content-Encoding"] = self.coding
+            _add_vary(headers, "Accept-Encoding")
+
+        if "content-length" in headers:
+            headers["Content-Length"] = str(len(body))
+        return body
+
+    def _tag_representation(self, headers: MutableHeaders, status: int) -> None:
+        """Give the ETag the suffix of the representation sent (or, on a 304, held by the client)"""
+        etag = headers.get("etag")
+        if etag is None or etag.startswith("W/"):
+            return
+        transformations = self.transformations
+        if status == 304:
+            # Nothing was transformed; whether the body would have been compressed
+            # depends on its size, so follow the tag the client revalidated with
+            transformations = ["msgpack"] if self.to_msgpack else []
+            if self.coding is not None:
+                compressed = representation_etag(etag, *transformations, self.coding)
+                if compressed in self.if_none_match:
+                    transformations.append(self.coding)
+        headers["ETag"] = representation_etag(etag, *transformations)
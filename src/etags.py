@@ -0,0 +1,67 @@
+"""
+ETag helpers for conditional requests on notes
+"""
+
+import hashlib
+import re
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional, Tuple
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+# Appended by ResponseEncodingMiddleware for each transformation of the body, so
+# every representation of a resource keeps its own strong validator
+REPRESENTATION_SUFFIXES = {"msgpack": "-mp", "gzip": "-gz", "br": "-br"}
+_REPRESENTATION = re.compile(r'(?:-mp)?(?:-gz|-br)?"$')
+
+
+def note_etag(note_id: int, updated_at: datetime) -> str:
+    """Strong ETag for a single note: its id and updated_at in microseconds"""
+    return f'"{note_id}.{(updated_at - _EPOCH) // _MICROSECOND}"'
+
+
+def page_etag(keys: Iterable[Tuple[int, datetime]], *extra: object) -> str:
+    """Strong ETag for a list page from its (id, updated_at) tuples and metadata"""
+    digest = hashlib.blake2b(digest_size=16)
+    for note_id, updated_at in keys:
+        digest.update(f"{note_id}.{(updated_at - _EPOCH) // _MICROSECOND};".encode())
+    digest.update(repr(extra).encode())
+    return f'"p.{digest.hexdigest()}"'
+
+
+def representation_etag(etag: str, *transformations: str) -> str:
+    """ETag of the representation produced by applying ``transformations`` in order"""
+    if not transformations or not etag.endswith('"'):
+        return etag
+    return etag[:-1] + "".join(REPRESENTATION_SUFFIXES[name] for name in transformations) + '"'
+
+
+def parse_note_etag(etag: str) -> Optional[Tuple[int, datetime]]:
+    """Recover (id, updated_at) from a note ETag, or None if it isn't one"""
+    try:
+        note_id, micros = etag.strip('"').split(".")
+        return int(note_id), _EPOCH + int(micros) * _MICROSECOND
+    except ValueError:
+        return None
+
+
+def _split(header: str) -> List[str]:
+    """Tags in a header, reduced to the ETag the route computed for the resource"""
+    return [_REPRESENTATION.sub('"', tag.strip()) for tag in header.split(",") if tag.strip()]
+
+
+def if_none_match(header: Optional[str], etag: str) -> bool:
+    """True when an If-None-Match header matches (weak comparison)"""
+    if not header:
+        return False
+    tags = _split(header)
+    return "*" in tags or etag in (tag[2:] if tag.startswith("W/") else tag for tag in tags)
+
+
+def if_match_tags(header: str) -> Optional[List[str]]:
+    """Strong tags from an If-Match header; None means "*" (any current version)"""
+    tags = _split(header)
+    if "*" in tags:
+        return None
+    return [tag for tag in tags if not tag.startswith("W/")]
@@ -0,0 +1,137 @@
+"""
+Liveness and readiness state
+
+``/livez`` answers from memory. ``/readyz`` reports the state kept by
+``HealthMonitor``, a background task that pings the database and samples pool
+saturation every ``HEALTH_CHECK_INTERVAL_SECONDS``, so probes never check out a
+connection themselves. A state the task has not refreshed for three intervals
+counts as not ready.
+
+The state is per worker process: with several workers behind one socket, a
+probe reports whichever worker accepted it.
+"""
+
+import asyncio
+import os
+import time
+from contextlib import suppress
+from typing import Any, Dict, Optional, Tuple
+
+import structlog
+
+from .config import settings
+from .database import get_engine, pool_monitor
+from .pool import PoolMonitor
+
+logger = structlog.get_logger()
+
+# Intervals without a refresh before the state is considered stale
+STALE_INTERVALS = 3
+
+
+class HealthMonitor:
+    """Periodically refreshed database reachability and pool saturation"""
+
+    def __init__(
+        self,
+        monitor: PoolMonitor,
+        interval: float = 5.0,
+        timeout: float = 2.0,
+        max_pool_saturation: float = 1.0
+    ):
+        self.monitor = monitor
+        self.interval = interval
+        self.timeout = timeout
+        self.max_pool_saturation = max_pool_saturation
+        self.database_ok: Optional[bool] = None
+        self.error: Optional[str] = None
+        self.pool_saturation: Optional[float] = None
+        self.checked_at: Optional[float] = None
+        self.checks = 0
+        self.failures = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def _ping(self) -> None:
+        async with get_engine().connect() as conn:
+            await conn.exec_driver_sql("SELECT 1")
+
+    async def check(self) -> None:
+        """Refresh the state; never raises"""
+        # Sampled before the ping, which holds a connection of its own
+        self.pool_saturation = self.monitor.saturation()
+        try:
+            await asyncio.wait_for(self._ping(), self.timeout)
+            database_ok, error = True, None
+        except Exception as e:
+            database_ok, error = False, str(e) or type(e).__name__
+            self.failures += 1
+
+        if database_ok != self.database_ok:
+            if database_ok:
+                logger.info("Database reachable")
+            else:
+                logger.warning("Database unreachable", error=error)
+        self.database_ok = database_ok
+        self.error = error
+        self.checked_at = time.monotonic()
+        self.checks += 1
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.check()
+
+    async def start(self) -> None:
+        """Check once, then keep refreshing in the background"""
+        await self.check()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    def readiness(self) -> Tuple[bool, Dict[str, Any]]:
+        """Whether to take traffic, plus the state behind the decision; does no I/O"""
+        if self.checked_at is None:
+            return False, {"status": "starting"}
+
+        age = time.monotonic() - self.checked_at
+        reasons = []
+        if not self.database_ok:
+            reasons.append("database unreachable")
+        if age > self.interval * STALE_INTERVALS:
+            reasons.append("health state stale")
+        if self.pool_saturation is not None and self.pool_saturation >= self.max_pool_saturation:
+            reasons.append("connection pool saturated")
+
+        state: Dict[str, Any] = {
+            "status": "not_ready" if reasons else "ready",
+            # Each worker keeps its own state; say which one answered
+            "worker": os.getpid(),
+            "database": "up" if self.database_ok else "down",
+            "pool_saturation": None if self.pool_saturation is None else round(self.pool_saturation, 3),
+            "checked_seconds_ago": round(age, 3),
+        }
+        if reasons:
+            state["reasons"] = reasons
+        if self.error:
+            state["error"] = self.error
+        return not reasons, state
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "ready": self.readiness()[0],
+            "checks": self.checks,
+            "failures": self.failures,
+        }
+
+
+health_monitor = HealthMonitor(
+    pool_monitor,
+    interval=settings.health_check_interval_seconds,
+    timeout=settings.health_check_timeout_seconds,
+    max_pool_saturation=settings.readiness_max_pool_saturation,
+)
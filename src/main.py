@@ -10,12 +10,27 @@ import os
 if __name__ == "__main__":
     sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from fastapi import FastAPI, HTTPException
+from src import boot
+
+from fastapi import Depends, FastAPI, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
 import structlog
 
-from src.database import engine, create_tables
+from src.database import check_schema_version, create_tables, dispose_engine, get_engine, pool_monitor
+from src.health import health_monitor
+from src.auth import password_hasher, principal_cache, token_cache
+from src.replicas import replica_router
+from src.response_cache import response_cache
+from src.encoding import ResponseEncodingMiddleware
+from src.profiling import ProfilingMiddleware
+from src.admission import AdmissionMiddleware
+from src.rate_limit import auth_ip_limiter, limit_client_ip, limit_user, user_limiter
+from src.query_stats import QueryStatsMiddleware, add_query_stats
+from src.metrics import (
+    CONTENT_TYPE as METRICS_CONTENT_TYPE, CallbackMetric, MetricsMiddleware, register_stats, registry
+)
 from src.routes import auth, notes
 from src.config import settings
 
@@ -26,6 +41,7 @@ structlog.configure(
         structlog.stdlib.add_logger_name,
         structlog.stdlib.add_log_level,
         structlog.stdlib.PositionalArgumentsFormatter(),
+        add_query_stats,
         structlog.processors.TimeStamper(fmt="iso"),
         structlog.processors.StackInfoRenderer(),
         structlog.processors.format_exc_info,
@@ -44,59 +60,122 @@ logger = structlog.get_logger()
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan events"""
-    # Startup
-    logger.info("Starting Notes API")
-    await create_tables()
-    logger.info("Database tables created")
+    # Startup: the engine is created here, inside the worker process
+    logger.info("Starting Notes API", pid=os.getpid())
+    get_engine()
+    if settings.schema_startup == "check":
+        version = await check_schema_version()
+        logger.info("Database schema version verified", version=version)
+    elif settings.schema_startup == "create":
+        await create_tables()
+        logger.info("Database tables created")
+    await health_monitor.start()
+    boot.mark("startup")
     yield
     # Shutdown
     logger.info("Shutting down Notes API")
+    await health_monitor.stop()
+    await password_hasher.shutdown()
+    await replica_router.dispose()
+    # Requests have drained by now; wait for their connections before closing the pool
+    await dispose_engine(settings.db_drain_seconds)
 
 
-# Create FastAPI app
-app = FastAPI(
-    title="Notes API",
-    description="API REST para gerenciamento de notas com autenticação",
-    version="1.0.0",
-    docs_url="/docs",
-    redoc_url="/redoc",
-    lifespan=lifespan
-)
-
-# Configure CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # Configure appropriately for production
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# Include routers
-app.include_router(auth.router, prefix="/auth", tags=["authentication"])
-app.include_router(notes.router, prefix="/notes", tags=["notes"])
-
-
-@app.get("/health")
 async def health_check():
-    """Health check endpoint"""
+    """Detailed health check; runs a query, so probes should use /livez and /readyz"""
     try:
         # Test database connection
         from sqlalchemy import text
-        async with engine.begin() as conn:
+        async with get_engine().begin() as conn:
             await conn.execute(text("SELECT 1"))
         
         return {
             "status": "ok",
             "message": "API is healthy",
-            "version": "1.0.0"
+            "version": "1.0.0",
+            "caches": {
+                "principal": principal_cache.stats(),
+                "token": token_cache.stats(),
+                "responses": response_cache.stats()
+            },
+            "password_hasher": password_hasher.stats(),
+            "pool": pool_monitor.stats(),
+            "read_routing": replica_router.stats(),
+            "readiness": health_monitor.readiness()[1]
         }
     except Exception as e:
         logger.error("Health check failed", error=str(e))
         raise HTTPException(status_code=503, detail="Service unavailable")
 
 
-@app.get("/")
+def _pool_stats():
+    monitors = [pool_monitor] + [replica.monitor for replica in replica_router.replicas]
+    return {monitor.name: monitor.stats() for monitor in monitors}
+
+
+def _cache_stats():
+    return {
+        "principal": principal_cache.stats(),
+        "token": token_cache.stats(),
+        "responses": response_cache.stats()
+    }
+
+
+def _rate_limit_stats():
+    return {limiter.name: limiter.stats() for limiter in (user_limiter, auth_ip_limiter)}
+
+
+def _hasher_stats():
+    return {password_hasher.kind: password_hasher.stats()}
+
+
+# Components that keep their own counters are read at scrape time
+for name, documentation, labelname, sources, key, kind in [
+    ("db_pool_size", "Configured pool size", "pool", _pool_stats, "size", "gauge"),
+    ("db_pool_connections_in_use", "Connections checked out", "pool", _pool_stats, "in_use", "gauge"),
+    ("db_pool_connections_idle", "Connections idle in the pool", "pool", _pool_stats, "idle", "gauge"),
+    ("db_pool_overflow", "Connections open beyond pool_size", "pool", _pool_stats, "overflow", "gauge"),
+    ("db_pool_checkouts_total", "Connection checkouts", "pool", _pool_stats, "checkouts", "counter"),
+    ("db_pool_checkout_timeouts_total", "Checkouts that timed out", "pool", _pool_stats, "timeouts", "counter"),
+    ("cache_entries", "Entries held by an in-process cache", "cache", _cache_stats, "size", "gauge"),
+    ("cache_hits_total", "Cache hits", "cache", _cache_stats, "hits", "counter"),
+    ("cache_misses_total", "Cache misses", "cache", _cache_stats, "misses", "counter"),
+    ("cache_evictions_total", "Entries evicted by the LRU bound", "cache", _cache_stats, "evictions", "counter"),
+    ("rate_limit_allowed_total", "Requests admitted by a rate limit", "limit", _rate_limit_stats, "allowed", "counter"),
+    ("password_hash_pending", "Password hashes queued or running", "executor", _hasher_stats, "pending", "gauge"),
+    ("password_hash_rejected_total", "Password hashes rejected as busy", "executor", _hasher_stats, "rejected", "counter"),
+]:
+    register_stats(name, documentation, labelname, sources, key, kind)
+
+registry.register(CallbackMetric(
+    "app_boot_seconds", "Seconds from application import to startup and to the first served request",
+    ("phase",), lambda: {(phase,): seconds for phase, seconds in boot.phases.items()}
+))
+
+registry.register(CallbackMetric(
+    "app_ready", "1 while /readyz reports the process ready to take traffic",
+    (), lambda: {(): int(health_monitor.readiness()[0])}
+))
+
+
+async def livez():
+    """Liveness probe: the event loop is serving requests (no I/O)"""
+    return {"status": "ok"}
+
+
+async def readyz():
+    """Readiness probe, answered from the background health state"""
+    ready, state = health_monitor.readiness()
+    return JSONResponse(state, status_code=200 if ready else 503)
+
+
+async def metrics():
+    """Prometheus metrics"""
+    if not settings.metrics_enabled:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return Response(registry.render(), media_type=METRICS_CONTENT_TYPE)
+
+
 async def root():
     """Root endpoint"""
     return {
@@ -107,7 +186,92 @@ async def root():
     }
 
 
+# Never shed, so probes and scrapes keep reporting while the worker is overloaded
+PROBE_PATHS = ("/livez", "/readyz", "/health", "/metrics")
+
+
+def create_app() -> FastAPI:
+    """Build the application; opens no connections (the engine is created at startup)"""
+    app = FastAPI(
+        title="Notes API",
+        description="API REST para gerenciamento de notas com autenticação",
+        version="1.0.0",
+        docs_url="/docs",
+        redoc_url="/redoc",
+        lifespan=lifespan
+    )
+    
+    # Configure CORS
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],  # Configure appropriately for production
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    
+    # Innermost of our middleware, so profiles cover only the application itself
+    if settings.profiling_enabled:
+        app.add_middleware(
+            ProfilingMiddleware,
+            token=settings.profiling_token,
+            sample_rate=settings.profiling_sample_rate,
+            output_dir=settings.profiling_output_dir,
+        )
+    
+    # MessagePack negotiation on note routes and brotli/gzip compression
+    app.add_middleware(
+        ResponseEncodingMiddleware,
+        minimum_size=settings.compression_minimum_size,
+        gzip_level=settings.gzip_compress_level,
+        brotli_quality=settings.brotli_quality,
+        msgpack_paths=("/notes",),
+        compress=settings.compression_enabled,
+    )
+    
+    # Per-request query count and DB time (Server-Timing header, log context)
+    app.add_middleware(QueryStatsMiddleware, server_timing=settings.server_timing)
+    
+    # Shed load before it queues on the pool; metrics still see the 503s
+    app.add_middleware(
+        AdmissionMiddleware,
+        pool_monitor=pool_monitor,
+        max_in_flight=settings.admission_max_in_flight,
+        max_pool_wait_ms=settings.admission_max_pool_wait_ms,
+        retry_after=settings.admission_retry_after_seconds,
+        exempt_paths=PROBE_PATHS,
+    )
+    
+    # Outermost, so latency and in-flight counts cover the whole middleware stack
+    if settings.metrics_enabled:
+        app.add_middleware(MetricsMiddleware)
+    
+    # Around everything, so boot timing does not depend on metrics being enabled
+    app.add_middleware(boot.FirstRequestMiddleware)
+    
+    # Include routers
+    app.include_router(
+        auth.router, prefix="/auth", tags=["authentication"], dependencies=[Depends(limit_client_ip)]
+    )
+    app.include_router(notes.router, prefix="/notes", tags=["notes"], dependencies=[Depends(limit_user)])
+    app.add_api_route("/health", health_check, methods=["GET"])
+    app.add_api_route("/livez", livez, methods=["GET"])
+    app.add_api_route("/readyz", readyz, methods=["GET"])
+    app.add_api_route("/metrics", metrics, methods=["GET"], include_in_schema=False)
+    app.add_api_route("/", root, methods=["GET"])
+    return app
+
+
+def __getattr__(name: str):
+    """Build ``app`` on first access (`uvicorn src.main:app`, tests); factory workers never do"""
+    if name == "app":
+        app = globals()["app"] = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 if __name__ == "__main__":
+    # Development server; run `python -m src.server` for multiple workers
     import uvicorn
     uvicorn.run(
         "src.main:app",
@@ -0,0 +1,120 @@
+"""
+Streaming NDJSON import of notes
+
+The request body is split into lines as it arrives, each line is validated
+against ``NoteCreate`` on its own, and valid rows are written in chunks:
+``COPY`` on asyncpg, one multi-row ``INSERT`` elsewhere. Memory is bounded by
+the chunk size and the maximum line length, never by the body size.
+"""
+
+from datetime import datetime
+from typing import AsyncIterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .database import Note
+from .schemas import NoteCreate, NoteImportError, NoteImportResponse
+
+# Rows buffered before each COPY / INSERT
+IMPORT_CHUNK_SIZE = 500
+# A valid NoteCreate line is far smaller than this, even fully \u-escaped
+IMPORT_MAX_LINE_BYTES = 256 * 1024
+# Row-level errors reported back; further failures are only counted
+IMPORT_MAX_ERRORS = 100
+
+IMPORT_COLUMNS = ("title", "content", "user_id", "created_at", "updated_at")
+
+
+async def iter_lines(chunks: AsyncIterator[bytes], max_line_bytes: int) -> AsyncIterator[Tuple[int, Optional[bytes]]]:
+    """Yield (line number, line) from a byte stream; lines over the limit come back as None"""
+    buffer = bytearray()
+    line_number = 0
+    oversized = False
+    async for chunk in chunks:
+        start = 0
+        while True:
+            end = chunk.find(b"\n", start)
+            if end < 0:
+                break
+            line_number += 1
+            if not oversized:
+                buffer += chunk[start:end]
+                oversized = len(buffer) > max_line_bytes
+            yield line_number, None if oversized else bytes(buffer)
+            buffer.clear()
+            oversized = False
+            start = end + 1
+        if not oversized:
+            buffer += chunk[start:]
+            if len(buffer) > max_line_bytes:
+                # Drop the rest of this line instead of buffering it
+                oversized = True
+                buffer.clear()
+    if oversized or buffer.strip():
+        yield line_number + 1, None if oversized else bytes(buffer)
+
+
+async def write_rows(db: AsyncSession, rows: List[tuple]) -> None:
+    """Insert rows given in IMPORT_COLUMNS order within the session's transaction"""
+    connection = await db.connection()
+    if connection.dialect.driver == "asyncpg":
+        # The asyncpg adapter sends BEGIN lazily with its first statement; COPY
+        # on the raw connection before that would autocommit each chunk
+        await connection.exec_driver_sql("SELECT 1")
+        raw_connection = await connection.get_raw_connection()
+        driver_connection = raw_connection.driver_connection
+        assert driver_connection is not None
+        await driver_connection.copy_records_to_table(
+            Note.__tablename__, records=rows, columns=IMPORT_COLUMNS
+        )
+    else:
+        await connection.execute(insert(Note).values([dict(zip(IMPORT_COLUMNS, row)) for row in rows]))
+
+
+def _describe(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in detail['loc']) or 'line'}: {detail['msg']}"
+        for detail in error.errors()
+    )
+
+
+async def import_notes(
+    db: AsyncSession,
+    user_id: int,
+    chunks: AsyncIterator[bytes],
+    chunk_size: int = IMPORT_CHUNK_SIZE
+) -> NoteImportResponse:
+    """Validate and write an NDJSON stream of notes; the caller commits"""
+    result = NoteImportResponse(imported=0, failed=0, errors=[])
+    rows: List[tuple] = []
+
+    def reject(line_number: int, message: str) -> None:
+        result.failed += 1
+        if len(result.errors) < IMPORT_MAX_ERRORS:
+            result.errors.append(NoteImportError(line=line_number, error=message))
+
+    async for line_number, line in iter_lines(chunks, IMPORT_MAX_LINE_BYTES):
+        if line is None:
+            reject(line_number, f"Line exceeds {IMPORT_MAX_LINE_BYTES} bytes")
+            continue
+        if not line.strip():
+            continue
+        try:
+            note = NoteCreate.model_validate_json(line)
+        except ValidationError as error:
+            reject(line_number, _describe(error))
+            continue
+
+        now = datetime.utcnow()
+        rows.append((note.title, note.content, user_id, now, now))
+        if len(rows) >= chunk_size:
+            await write_rows(db, rows)
+            result.imported += len(rows)
+            rows = []
+
+    if rows:
+        await write_rows(db, rows)
+        result.imported += len(rows)
+    return result
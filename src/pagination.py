@@ -0,0 +1,43 @@
+"""
+Cursor (keyset) pagination helpers
+"""
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded"""
+
+
+class CursorKey(NamedTuple):
+    """Sort key of the last note on a page"""
+    updated_at: datetime
+    id: int
+    # Search relevance, only present for cursors issued by a search listing
+    rank: Optional[float] = None
+
+
+def encode_cursor(updated_at: datetime, note_id: int, rank: Optional[float] = None) -> str:
+    """Encode the sort key of the last returned note into an opaque token"""
+    key = [updated_at.isoformat(), note_id]
+    if rank is not None:
+        key.append(rank)
+    raw = json.dumps(key, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> CursorKey:
+    """Decode a token produced by encode_cursor"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(key, list) or len(key) not in (2, 3):
+            raise ValueError("Unexpected cursor shape")
+        rank = float(key[2]) if len(key) == 3 else None
+        return CursorKey(datetime.fromisoformat(key[0]), int(key[1]), rank)
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError) as exc:
+        raise InvalidCursor("Invalid cursor") from exc
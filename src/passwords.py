@@ -0,0 +1,118 @@
+"""
+Password hashing and the worker pool that keeps it off the event loop
+"""
+
+import asyncio
+import hashlib
+import os
+import secrets
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+PBKDF2_ITERATIONS = 100000
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password against its hash"""
+    try:
+        # Split the stored hash to get salt and hash
+        salt, stored_hash = hashed_password.split(':')
+        # Hash the provided password with the same salt
+        password_hash = hashlib.pbkdf2_hmac('sha256', plain_password.encode(), salt.encode(), PBKDF2_ITERATIONS)
+        return password_hash.hex() == stored_hash
+    except ValueError:
+        return False
+
+
+def get_password_hash(password: str) -> str:
+    """Hash a password using PBKDF2"""
+    # Generate a random salt
+    salt = secrets.token_hex(16)
+    # Hash the password with the salt
+    password_hash = hashlib.pbkdf2_hmac('sha256', password.encode(), salt.encode(), PBKDF2_ITERATIONS)
+    # Return salt:hash format
+    return f"{salt}:{password_hash.hex()}"
+
+
+class HasherBusy(RuntimeError):
+    """Raised when the hashing pool already holds its maximum of pending jobs"""
+
+
+class PasswordHasher:
+    """Runs PBKDF2 on a bounded thread or process pool
+
+    hashlib releases the GIL while hashing, so threads already scale across
+    cores; a process pool isolates the work further at a higher per-call cost.
+    Jobs beyond ``max_pending`` are rejected instead of queueing without bound,
+    so a login storm only slows down logins.
+    """
+
+    def __init__(self, kind: str = "thread", workers: int = 2, max_pending: int = 64):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown password hash executor: {kind}")
+        self.kind = kind
+        self.workers = workers if workers > 0 else (os.cpu_count() or 1)
+        self.max_pending = max_pending
+        self._executor: Optional[Executor] = None
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def _get_executor(self) -> Executor:
+        # Created lazily so each forked worker process gets its own pool
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers,
+                    thread_name_prefix="password-hash"
+                )
+        return self._executor
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Run ``func(*args)`` on the pool, enforcing the admission limit"""
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise HasherBusy("Too many pending password hashing jobs")
+
+        job = self._get_executor().submit(func, *args)
+        self.pending += 1
+        # A job stays pending until the worker is done with it, even if its caller is cancelled
+        done = asyncio.wrap_future(job)
+        done.add_done_callback(self._job_done)
+        try:
+            return await asyncio.shield(done)
+        except asyncio.CancelledError:
+            # Drop the job if no worker has picked it up yet
+            job.cancel()
+            raise
+
+    def _job_done(self, done: "asyncio.Future[Any]") -> None:
+        self.pending -= 1
+        if not done.cancelled() and done.exception() is None:
+            self.completed += 1
+
+    async def hash(self, password: str) -> str:
+        return await self.run(get_password_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self.run(verify_password, plain_password, hashed_password)
+
+    async def shutdown(self) -> None:
+        """Drain running jobs without blocking the event loop"""
+        if self._executor is not None:
+            executor, self._executor = self._executor, None
+            await asyncio.to_thread(executor.shutdown, wait=True, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool occupancy; queue_depth counts jobs waiting for a free worker"""
+        return {
+            "executor": self.kind,
+            "workers": self.workers,
+            "pending": self.pending,
+            "queue_depth": max(0, self.pending - self.workers),
+            "max_pending": self.max_pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
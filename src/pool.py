@@ -0,0 +1,162 @@
+"""
+Connection pool instrumentation
+"""
+
+import time
+from typing import Any, Dict, Optional
+
+import structlog
+from sqlalchemy import event, exc
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, PoolProxiedConnection, QueuePool
+
+logger = structlog.get_logger()
+
+# Weight of the newest checkout in the wait moving average
+EWMA_ALPHA = 0.2
+
+
+class MonitoredQueuePool(AsyncAdaptedQueuePool):
+    """Async queue pool that reports how long each checkout waited
+
+    SQLAlchemy has no "before checkout" pool event, so the wait is timed around
+    the public ``connect()`` (which includes opening a new connection and the
+    pre-ping); everything else is collected through pool events.
+    """
+
+    monitor: Optional["PoolMonitor"] = None
+
+    def connect(self) -> PoolProxiedConnection:
+        if self.monitor is None:
+            return super().connect()
+
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.monitor.record_timeout(time.perf_counter() - started)
+            raise
+        self.monitor.record_wait(time.perf_counter() - started)
+        return connection
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.monitor = self.monitor
+        return pool
+
+
+class PoolMonitor:
+    """Checkout wait, in-use and overflow statistics for one engine's pool"""
+
+    def __init__(self, name: str, slow_checkout_ms: float = 100.0):
+        self.name = name
+        self.slow_checkout_ms = slow_checkout_ms
+        self.engine: Optional[AsyncEngine] = None
+        self.checkouts = 0
+        self.connects = 0
+        self.overflow_events = 0
+        self.timeouts = 0
+        self.invalidations = 0
+        self.waits = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.last_wait = 0.0
+        # Moving average of recent checkout waits, for load shedding
+        self.wait_ewma = 0.0
+        self.wait_ewma_at = 0.0
+
+    def attach(self, engine: AsyncEngine) -> None:
+        """Register pool event listeners on an engine"""
+        self.engine = engine
+        sync_engine = engine.sync_engine
+        if isinstance(sync_engine.pool, MonitoredQueuePool):
+            sync_engine.pool.monitor = self
+
+        event.listen(sync_engine, "connect", self._on_connect)
+        event.listen(sync_engine, "checkout", self._on_checkout)
+        event.listen(sync_engine, "invalidate", self._on_invalidate)
+
+    def _queue_pool(self) -> Optional[QueuePool]:
+        """The engine's current pool, if it is a sized queue pool (NullPool/StaticPool aren't)"""
+        pool = self.engine.sync_engine.pool if self.engine is not None else None
+        return pool if isinstance(pool, QueuePool) else None
+
+    def _on_connect(self, dbapi_connection, connection_record) -> None:
+        self.connects += 1
+        pool = self._queue_pool()
+        overflow = pool.overflow() if pool is not None else 0
+        if overflow > 0:
+            # New connection opened beyond pool_size
+            self.overflow_events += 1
+            logger.warning("Database pool overflow", pool=self.name, overflow=overflow)
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy) -> None:
+        self.checkouts += 1
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception) -> None:
+        self.invalidations += 1
+
+    def _update_ewma(self, seconds: float) -> None:
+        self.wait_ewma += EWMA_ALPHA * (seconds - self.wait_ewma)
+        self.wait_ewma_at = time.monotonic()
+
+    def recent_wait(self, max_age: float) -> float:
+        """Average checkout wait, or 0 if no checkout finished in the last max_age seconds"""
+        if time.monotonic() - self.wait_ewma_at > max_age:
+            return 0.0
+        return self.wait_ewma
+
+    def record_wait(self, seconds: float) -> None:
+        self.waits += 1
+        self.last_wait = seconds
+        self._update_ewma(seconds)
+        self.wait_total += seconds
+        self.wait_max = max(self.wait_max, seconds)
+        if seconds * 1000 >= self.slow_checkout_ms:
+            logger.warning(
+                "Slow database pool checkout",
+                pool=self.name,
+                wait_ms=round(seconds * 1000, 2),
+                **self._occupancy()
+            )
+
+    def record_timeout(self, seconds: float) -> None:
+        self.timeouts += 1
+        self.last_wait = seconds
+        self._update_ewma(seconds)
+        logger.error("Database pool checkout timed out", pool=self.name, wait_ms=round(seconds * 1000, 2))
+
+    def _occupancy(self) -> Dict[str, Any]:
+        pool = self._queue_pool()
+        if pool is None:
+            # NullPool/StaticPool (e.g. SQLite) don't keep a sized pool
+            return {"size": None, "in_use": None, "idle": None, "overflow": None}
+        return {
+            "size": pool.size(),
+            "in_use": pool.checkedout(),
+            "idle": pool.checkedin(),
+            "overflow": pool.overflow(),
+        }
+
+    def saturation(self) -> Optional[float]:
+        """Share of the pool's capacity (pool_size + max_overflow) checked out; None if unbounded"""
+        pool = self._queue_pool()
+        max_overflow: int = getattr(pool, "_max_overflow", -1)
+        if pool is None or max_overflow < 0:
+            return None
+        capacity = pool.size() + max_overflow
+        return pool.checkedout() / capacity if capacity else None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pool": self.name,
+            **self._occupancy(),
+            "checkouts": self.checkouts,
+            "connects": self.connects,
+            "overflow_events": self.overflow_events,
+            "timeouts": self.timeouts,
+            "invalidations": self.invalidations,
+            "wait_avg_ms": round(self.wait_total / self.waits * 1000, 3) if self.waits else 0.0,
+            "wait_max_ms": round(self.wait_max * 1000, 3),
+            "last_wait_ms": round(self.last_wait * 1000, 3),
+        }
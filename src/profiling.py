@@ -0,0 +1,133 @@
+"""
+On-demand request profiling
+
+``ProfilingMiddleware`` runs selected requests under cProfile: requests that
+send ``X-Profile: <PROFILING_TOKEN>``, plus a random ``PROFILING_SAMPLE_RATE``
+share of all requests. The profile covers everything the handler does on the
+event loop (dependency resolution, auth, DB awaits, serialization). Profiles
+are written to ``PROFILING_OUTPUT_DIR`` as ``.prof`` files (open them with
+``python -m pstats`` or snakeviz), or, with ``X-Profile-Output: inline``,
+returned as a text report instead of the response body.
+
+cProfile is process-wide, so only one request is profiled at a time and other
+coroutines interleaving on the loop show up in the profile too. The middleware
+is only installed when ``PROFILING_ENABLED`` is set, so it costs nothing
+otherwise.
+"""
+
+import asyncio
+import cProfile
+import hmac
+import io
+import os
+import pstats
+import random
+import re
+import time
+from typing import Optional
+
+import structlog
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = structlog.get_logger()
+
+# Functions listed in inline reports, sorted by cumulative time
+REPORT_LIMIT = 60
+
+
+class ProfilingMiddleware:
+    """Profile requests chosen by an authenticated header or by sampling"""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        token: str = "",
+        sample_rate: float = 0.0,
+        output_dir: str = "./profiles"
+    ):
+        self.app = app
+        self.token = token
+        self.sample_rate = sample_rate
+        self.output_dir = output_dir
+        self._busy = False
+
+    def _mode(self, scope: Scope) -> Optional[str]:
+        """Profiling mode for this request ("inline" or "file"), or None"""
+        headers = Headers(scope=scope)
+        requested = headers.get("x-profile")
+        if requested and self.token and hmac.compare_digest(requested.encode(), self.token.encode()):
+            return "inline" if headers.get("x-profile-output") == "inline" else "file"
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return "file"
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        mode = self._mode(scope)
+        if mode is None or self._busy:
+            await self.app(scope, receive, send)
+            return
+
+        self._busy = True
+        profiler = cProfile.Profile()
+        try:
+            if mode == "inline":
+                await self._profile_inline(profiler, scope, receive, send)
+            else:
+                profiler.enable()
+                try:
+                    await self.app(scope, receive, send)
+                finally:
+                    profiler.disable()
+                await self._write(profiler, scope)
+        finally:
+            self._busy = False
+
+    async def _profile_inline(self, profiler: cProfile.Profile, scope: Scope, receive: Receive, send: Send) -> None:
+        """Run the request, discard its body and answer with the profile report"""
+        status_code = 500
+
+        async def discard(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            await self.app(scope, receive, discard)
+        finally:
+            profiler.disable()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        report = io.StringIO()
+        report.write(f"{scope['method']} {scope['path']} -> {status_code} in {elapsed_ms:.3f} ms\n\n")
+        pstats.Stats(profiler, stream=report).sort_stats("cumulative").print_stats(REPORT_LIMIT)
+        body = report.getvalue().encode()
+
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"text/plain; charset=utf-8"),
+                (b"content-length", str(len(body)).encode()),
+                (b"x-profiled-status", str(status_code).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    async def _write(self, profiler: cProfile.Profile, scope: Scope) -> None:
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", scope["path"]).strip("_") or "root"
+        name = f"{time.strftime('%Y%m%dT%H%M%S')}-{scope['method']}-{slug}-{os.getpid()}-{random.getrandbits(24):06x}"
+        path = os.path.join(self.output_dir, f"{name}.prof")
+
+        def dump() -> None:
+            os.makedirs(self.output_dir, exist_ok=True)
+            profiler.dump_stats(path)
+
+        await asyncio.to_thread(dump)
+        logger.info("Request profiled", method=scope["method"], path=scope["path"], profile=path)
@@ -0,0 +1,174 @@
+"""
+Per-request SQL instrumentation
+
+Cursor execution events on every engine tally query count and DB time into the
+current request's ``QueryStats`` (held in a context variable), feed the
+``db_query_duration_seconds`` histogram and log slow statements with their
+parameters redacted. ``QueryStatsMiddleware`` opens the tally for each request
+and reports it in a ``Server-Timing`` header and on structlog lines. Work run
+on behalf of several requests (a coalesced read) is tallied with ``collect``
+and added to each of them with ``credit``.
+"""
+
+import time
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Optional, Tuple, TypeVar
+
+import structlog
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from structlog.types import EventDict
+
+from .config import settings
+from .metrics import db_query_duration_seconds
+
+logger = structlog.get_logger()
+
+T = TypeVar("T")
+
+
+class QueryStats:
+    """Query count and total DB time of one request"""
+
+    __slots__ = ("count", "duration")
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    @property
+    def duration_ms(self) -> float:
+        return round(self.duration * 1000, 3)
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    """Stats of the request being served, or None outside a request"""
+    return _current.get()
+
+
+async def collect(fn: Callable[[], Awaitable[T]]) -> Tuple[T, QueryStats]:
+    """Run ``fn`` with a tally of its own; await it as a separate task"""
+    stats = QueryStats()
+    # Only the task's copy of the context sees this
+    _current.set(stats)
+    return await fn(), stats
+
+
+def credit(stats: QueryStats) -> None:
+    """Add queries run on the current request's behalf elsewhere to its tally"""
+    current = _current.get()
+    if current is not None:
+        current.count += stats.count
+        current.duration += stats.duration
+
+
+def redact_parameters(parameters: Any) -> Any:
+    """Keep the shape and types of bound parameters, never their values"""
+    if isinstance(parameters, dict):
+        return {key: f"<{type(value).__name__}>" for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (dict, list, tuple)):
+            # executemany: one parameter set per row
+            return f"<{len(parameters)} rows>"
+        return [f"<{type(value).__name__}>" for value in parameters]
+    return f"<{type(parameters).__name__}>"
+
+
+def _operation(statement: str) -> str:
+    keyword = statement.lstrip()[:6].lower()
+    return keyword if keyword in ("select", "insert", "update", "delete") else "other"
+
+
+def instrument_engine(engine: AsyncEngine, name: str) -> None:
+    """Attach timing listeners to ``engine``"""
+    sync_engine = engine.sync_engine
+
+    # The start time lives on the execution context, which is discarded with the
+    # statement, so statements that raise leave nothing behind on the connection
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._query_started = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_query_started", None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+
+        stats = _current.get()
+        if stats is not None:
+            stats.count += 1
+            stats.duration += elapsed
+        if settings.metrics_enabled:
+            db_query_duration_seconds.observe(elapsed, name, _operation(statement))
+        if settings.slow_query_ms > 0 and elapsed * 1000 >= settings.slow_query_ms:
+            logger.warning(
+                "Slow query",
+                engine=name,
+                duration_ms=round(elapsed * 1000, 3),
+                statement=statement,
+                parameters=redact_parameters(parameters)
+            )
+
+
+def add_query_stats(logger: Any, method_name: str, event_dict: EventDict) -> EventDict:
+    """structlog processor: attach the request's query count and DB time to every line"""
+    stats = _current.get()
+    if stats is not None:
+        event_dict.setdefault("db_queries", stats.count)
+        event_dict.setdefault("db_ms", stats.duration_ms)
+    return event_dict
+
+
+class QueryStatsMiddleware:
+    """Open a QueryStats per request and report it in Server-Timing"""
+
+    def __init__(self, app: ASGIApp, server_timing: bool = True):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] != "http.response.start":
+                await send(message)
+                return
+            status_code = message["status"]
+            if self.server_timing:
+                # Queries made while streaming the body land after the header is sent
+                total_ms = (time.perf_counter() - started) * 1000
+                queries = "1 query" if stats.count == 1 else f"{stats.count} queries"
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing",
+                    f'db;dur={stats.duration_ms};desc="{queries}", app;dur={total_ms:.3f}'
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            logger.debug(
+                "Request completed",
+                method=scope["method"],
+                path=scope["path"],
+                status=status_code,
+                duration_ms=round((time.perf_counter() - started) * 1000, 3)
+            )
+            _current.reset(token)
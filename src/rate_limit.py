@@ -0,0 +1,155 @@
+"""
+Token-bucket rate limiting
+
+Each key (an authenticated user, or a client IP on the auth routes) owns a
+bucket of ``burst`` tokens refilled at ``rate`` tokens per second; a request
+takes one token or is rejected with 429 and the seconds until one is available
+in ``Retry-After``. Buckets live in a pluggable backend: in-process by default
+(limits then apply per worker), or Redis to share them across workers and
+instances.
+"""
+
+import math
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi import Depends, HTTPException, Request, status
+
+from .auth import get_current_active_user
+from .cache import TTLCache
+from .config import settings
+from .database import User
+from .metrics import Counter, registry
+
+rate_limited_total = registry.register(Counter(
+    "rate_limited_requests_total", "Requests rejected by a rate limit", ("limit",)
+))
+
+
+class LimiterBackend(ABC):
+    """Bucket storage interface"""
+
+    @abstractmethod
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        """Take one token; return 0 if allowed, else seconds until a token is available"""
+
+
+class InMemoryLimiterBackend(LimiterBackend):
+    """Process-local buckets in a bounded LRU
+
+    A bucket is dropped once it would have refilled completely, so only active
+    keys take memory; an evicted bucket simply starts full again.
+    """
+
+    def __init__(self, max_keys: int = 100000):
+        self.buckets = TTLCache(max_size=max_keys, ttl=3600.0)
+
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        now = time.monotonic()
+        state: Optional[Tuple[float, float]] = self.buckets.get(key)
+        tokens, updated = state if state is not None else (float(burst), now)
+        tokens = min(float(burst), tokens + (now - updated) * rate)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / rate
+        self.buckets.set(key, (tokens, now), ttl=(burst - tokens) / rate)
+        return wait
+
+
+# Refill and take atomically; the wait is returned as a string because Redis
+# truncates Lua numbers to integers
+_TAKE_SCRIPT = """
+local rate, burst, now = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(bucket[1]) or burst
+local updated = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+local wait = 0
+if tokens >= 1 then tokens = tokens - 1 else wait = (1 - tokens) / rate end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil((burst - tokens) / rate * 1000) + 1)
+return tostring(wait)
+"""
+
+
+class RedisLimiterBackend(LimiterBackend):
+    """Buckets shared through a redis.asyncio-compatible client"""
+
+    def __init__(self, client: Any):
+        self.client = client
+
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        wait = await self.client.eval(_TAKE_SCRIPT, 1, key, rate, burst, time.time())
+        return float(wait)
+
+
+class RateLimiter:
+    """One named limit: ``rate`` requests per second with bursts of ``burst``"""
+
+    def __init__(self, backend: LimiterBackend, name: str, rate: float, burst: int):
+        self.backend = backend
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.allowed = 0
+        self.limited = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0 and self.burst > 0
+
+    async def check(self, key: Any) -> None:
+        """Take a token for ``key`` or raise 429 with Retry-After"""
+        if not self.enabled:
+            return
+        wait = await self.backend.take(f"ratelimit:{self.name}:{key}", self.rate, self.burst)
+        if wait <= 0:
+            self.allowed += 1
+            return
+
+        self.limited += 1
+        rate_limited_total.inc(self.name)
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Rate limit exceeded",
+            headers={"Retry-After": str(max(1, math.ceil(wait)))},
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rate": self.rate,
+            "burst": self.burst,
+            "allowed": self.allowed,
+            "limited": self.limited,
+        }
+
+
+def create_backend() -> LimiterBackend:
+    """Build the backend selected in settings"""
+    if settings.rate_limit_backend == "redis":
+        try:
+            import redis.asyncio as redis  # type: ignore[import]
+        except ImportError as exc:
+            raise RuntimeError("RATE_LIMIT_BACKEND=redis requires the 'redis' package") from exc
+        return RedisLimiterBackend(redis.from_url(settings.rate_limit_url))
+    return InMemoryLimiterBackend()
+
+
+_backend = create_backend()
+user_limiter = RateLimiter(_backend, "user", settings.rate_limit_user_rate, settings.rate_limit_user_burst)
+auth_ip_limiter = RateLimiter(
+    _backend, "auth_ip", settings.rate_limit_auth_ip_rate, settings.rate_limit_auth_ip_burst
+)
+
+
+async def limit_user(current_user: User = Depends(get_current_active_user)) -> None:
+    """Dependency: per-user limit on authenticated routes"""
+    await user_limiter.check(current_user.id)
+
+
+async def limit_client_ip(request: Request) -> None:
+    """Dependency: per-IP limit on unauthenticated auth routes"""
+    await auth_ip_limiter.check(request.client.host if request.client else "unknown")
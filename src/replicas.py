@@ -0,0 +1,139 @@
+"""
+Read-replica routing with read-your-writes pinning
+"""
+
+import itertools
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import structlog
+from sqlalchemy import exc
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+
+from .cache import TTLCache
+from .config import settings
+from .database import AsyncSessionLocal, convert_database_url, engine_options
+from .query_stats import instrument_engine
+from .pool import PoolMonitor
+
+logger = structlog.get_logger()
+
+# Errors that mean the replica itself is unhealthy rather than the query being wrong
+REPLICA_FAILURES = (exc.OperationalError, exc.InterfaceError, exc.TimeoutError, OSError)
+
+
+class Replica:
+    """One read replica engine and its health state"""
+
+    def __init__(self, name: str, url: str):
+        self.name = name
+        self.url = convert_database_url(url)
+        # Created on first use in each process, like the primary engine
+        self.engine: Optional[AsyncEngine] = None
+        self._sessionmaker: Optional[async_sessionmaker] = None
+        self.monitor = PoolMonitor(name, slow_checkout_ms=settings.db_pool_slow_checkout_ms)
+        self.ejected_until = 0.0
+        self.ejections = 0
+
+    @property
+    def sessionmaker(self) -> async_sessionmaker:
+        if self._sessionmaker is None:
+            self.engine = create_async_engine(self.url, future=True, **engine_options(self.url))
+            self.monitor.attach(self.engine)
+            instrument_engine(self.engine, self.name)
+            self._sessionmaker = async_sessionmaker(self.engine, class_=AsyncSession, expire_on_commit=False)
+        return self._sessionmaker
+
+    async def dispose(self) -> None:
+        if self.engine is not None:
+            await self.engine.dispose()
+            self.engine = None
+            self._sessionmaker = None
+
+    @property
+    def healthy(self) -> bool:
+        return self.ejected_until <= time.monotonic()
+
+
+class ReplicaRouter:
+    """Round-robin over healthy replicas; users who just wrote stay on the primary"""
+
+    def __init__(self, urls: List[str], eject_seconds: float = 30.0, pin_seconds: float = 5.0):
+        self.replicas = [Replica(f"replica-{index}", url) for index, url in enumerate(urls)]
+        self.eject_seconds = eject_seconds
+        self._next = itertools.cycle(range(len(self.replicas))) if self.replicas else None
+        # user_id -> True while reads must go to the primary after a write
+        self._pins = TTLCache(max_size=100000, ttl=pin_seconds)
+        self.primary_reads = 0
+        self.replica_reads = 0
+
+    @classmethod
+    def from_settings(cls) -> "ReplicaRouter":
+        urls = [url.strip() for url in settings.database_replicas.split(",") if url.strip()]
+        return cls(urls, settings.replica_eject_seconds, settings.replica_pin_seconds)
+
+    def pin(self, user_id: int) -> None:
+        """Send this user's reads to the primary for a short while after a write"""
+        if self.replicas:
+            self._pins.set(user_id, True)
+
+    def choose(self, user_id: Optional[int] = None) -> Optional[Replica]:
+        """Pick the next healthy replica, or None to read from the primary"""
+        if self._next is None or (user_id is not None and self._pins.get(user_id)):
+            return None
+        for _ in range(len(self.replicas)):
+            replica = self.replicas[next(self._next)]
+            if replica.healthy:
+                return replica
+        return None
+
+    def eject(self, replica: Replica, error: BaseException) -> None:
+        """Take a failing replica out of rotation for eject_seconds"""
+        replica.ejected_until = time.monotonic() + self.eject_seconds
+        replica.ejections += 1
+        logger.warning("Read replica ejected", replica=replica.name, error=str(error))
+
+    async def dispose(self) -> None:
+        for replica in self.replicas:
+            await replica.dispose()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "primary_reads": self.primary_reads,
+            "replica_reads": self.replica_reads,
+            "pinned_users": len(self._pins),
+            "replicas": [
+                {
+                    "name": replica.name,
+                    "healthy": replica.healthy,
+                    "ejections": replica.ejections,
+                    "pool": replica.monitor.stats(),
+                }
+                for replica in self.replicas
+            ],
+        }
+
+
+replica_router = ReplicaRouter.from_settings()
+
+
+@asynccontextmanager
+async def read_session(user_id: Optional[int] = None) -> AsyncIterator[AsyncSession]:
+    """Session on a healthy replica, or the primary if none is usable or the user just wrote"""
+    replica = replica_router.choose(user_id)
+    sessionmaker: async_sessionmaker
+    if replica is None:
+        replica_router.primary_reads += 1
+        sessionmaker = AsyncSessionLocal
+    else:
+        replica_router.replica_reads += 1
+        sessionmaker = replica.sessionmaker
+
+    async with sessionmaker() as session:
+        try:
+            yield session
+        except REPLICA_FAILURES as error:
+            if replica is not None:
+                replica_router.eject(replica, error)
+            raise
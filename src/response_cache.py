@@ -0,0 +1,160 @@
+"""
+Per-user cache for serialized note list pages
+
+Entries are keyed by user, the user's current generation and the normalized
+query parameters. Every write bumps the user's generation, which makes all of
+their cached pages unreachable at once; stale entries simply age out.
+"""
+
+import hashlib
+import itertools
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from .cache import TTLCache
+from .config import settings
+
+
+class CacheBackend(ABC):
+    """Storage interface a shared store (e.g. Redis) can implement"""
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        ...
+
+    @abstractmethod
+    async def incr(self, key: str) -> int:
+        """Atomically move an integer key to a value it has not had before"""
+
+
+class InMemoryCacheBackend(CacheBackend):
+    """Process-local backend: bounded LRU for pages, generations kept for one TTL
+
+    A generation only has to outlive the pages cached under the ones before
+    it, which are gone one TTL after the bump; it is then dropped. The next
+    bump draws from a backend-wide sequence, so a user's pages never reuse
+    a generation number while any older page could still be cached.
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.ttl = ttl
+        self.entries = TTLCache(max_size=max_entries, ttl=ttl)
+        # key -> (generation, bumped at), oldest bump first
+        self.counters: "OrderedDict[str, Tuple[int, float]]" = OrderedDict()
+        self._generations = itertools.count(1)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        counter = self.counters.get(key)
+        if counter is not None:
+            return str(counter[0]).encode()
+        return self.entries.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        self.entries.set(key, value, ttl=ttl)
+
+    async def incr(self, key: str) -> int:
+        now = time.monotonic()
+        while self.counters:
+            oldest, (_, bumped_at) = next(iter(self.counters.items()))
+            if bumped_at > now - self.ttl:
+                break
+            del self.counters[oldest]
+        generation = next(self._generations)
+        self.counters[key] = (generation, now)
+        self.counters.move_to_end(key)
+        return generation
+
+
+class RedisCacheBackend(CacheBackend):
+    """Backend for a redis.asyncio-compatible client
+
+    Generation keys are written without a TTL; run Redis with a ``volatile-*``
+    eviction policy so only page entries can be evicted.
+    """
+
+    def __init__(self, client: Any):
+        self.client = client
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.client.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        await self.client.set(key, value, px=max(1, int(ttl * 1000)))
+
+    async def incr(self, key: str) -> int:
+        return await self.client.incr(key)
+
+
+class ResponseCache:
+    """Generation-invalidated page cache with hit-ratio counters"""
+
+    def __init__(self, backend: CacheBackend, ttl: float, prefix: str = "notes"):
+        self.backend = backend
+        self.ttl = ttl
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def _generation_key(self, user_id: int) -> str:
+        return f"{self.prefix}:gen:{user_id}"
+
+    async def _page_key(self, user_id: int, params: Tuple) -> str:
+        generation = await self.backend.get(self._generation_key(user_id))
+        digest = hashlib.blake2b(repr(params).encode(), digest_size=16).hexdigest()
+        return f"{self.prefix}:page:{user_id}:{int(generation or 0)}:{digest}"
+
+    async def get(self, user_id: int, params: Tuple) -> Tuple[str, Optional[bytes]]:
+        """Return (key, cached value); pass the key back to ``set`` on a miss"""
+        key = await self._page_key(user_id, params)
+        value = await self.backend.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return key, value
+
+    async def set(self, key: str, value: bytes) -> None:
+        await self.backend.set(key, value, self.ttl)
+
+    async def invalidate(self, user_id: int) -> None:
+        """Drop every cached page of a user by bumping their generation"""
+        self.invalidations += 1
+        await self.backend.incr(self._generation_key(user_id))
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+def create_backend() -> CacheBackend:
+    """Build the backend selected in settings"""
+    if settings.response_cache_backend == "redis":
+        try:
+            import redis.asyncio as redis  # type: ignore[import]
+        except ImportError as exc:
+            raise RuntimeError("RESPONSE_CACHE_BACKEND=redis requires the 'redis' package") from exc
+        return RedisCacheBackend(redis.from_url(settings.response_cache_url))
+    return InMemoryCacheBackend(
+        max_entries=settings.response_cache_max_entries,
+        ttl=settings.response_cache_ttl_seconds
+    )
+
+
+response_cache = ResponseCache(create_backend(), ttl=settings.response_cache_ttl_seconds)
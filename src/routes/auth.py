@@ -3,18 +3,40 @@ Authentication routes
 """
 
 from datetime import timedelta
+from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..database import get_db
-from ..auth import authenticate_user, create_access_token, get_password_hash
+from ..auth import authenticate_user, create_access_token, hash_password
 from ..schemas import LoginRequest, Token, UserCreate, UserResponse
 from ..database import User
-from sqlalchemy import select
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
 
 router = APIRouter()
 
 
+DUPLICATE_USER_MESSAGES = {
+    "username": "Username already registered",
+    "email": "Email already registered",
+}
+
+
+def _duplicate_user_field(exc: IntegrityError) -> Optional[str]:
+    """Map a unique violation on users to the offending field"""
+    if exc.orig is None:
+        return None
+    # asyncpg exposes the index name; SQLite only reports "users.<column>"
+    constraint = getattr(exc.orig.__cause__, "constraint_name", None)
+    message = str(exc.orig)
+    for field in DUPLICATE_USER_MESSAGES:
+        index_name = f"ix_users_{field}"
+        if constraint == index_name or f'"{index_name}"' in message or f"users.{field}" in message:
+            return field
+    return None
+
+
 @router.post("/token", response_model=Token)
 async def login_for_access_token(
     form_data: LoginRequest,
@@ -43,36 +65,28 @@ async def register_user(
     db: AsyncSession = Depends(get_db)
 ):
     """Register a new user"""
-    # Check if username already exists
-    existing_user = await db.execute(
-        select(User).where(User.username == user_data.username)
-    )
-    if existing_user.scalar_one_or_none():
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Username already registered"
-        )
+    hashed_password = await hash_password(user_data.password)
     
-    # Check if email already exists
-    existing_email = await db.execute(
-        select(User).where(User.email == user_data.email)
-    )
-    if existing_email.scalar_one_or_none():
+    # Single INSERT; duplicates are detected by the unique indexes, not pre-check queries
+    try:
+        db_user = await db.scalar(
+            insert(User)
+            .values(
+                username=user_data.username,
+                email=user_data.email,
+                hashed_password=hashed_password
+            )
+            .returning(User)
+        )
+        await db.commit()
+    except IntegrityError as exc:
+        await db.rollback()
+        field = _duplicate_user_field(exc)
+        if field is None:
+            raise
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered"
+            detail=DUPLICATE_USER_MESSAGES[field]
         )
     
-    # Create new user
-    hashed_password = get_password_hash(user_data.password)
-    db_user = User(
-        username=user_data.username,
-        email=user_data.email,
-        hashed_password=hashed_password
-    )
-    
-    db.add(db_user)
-    await db.commit()
-    await db.refresh(db_user)
-    
     return db_user
@@ -2,79 +2,321 @@
 Notes routes
 """
 
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+import asyncio
+import csv
+import io
+from datetime import datetime
+from typing import Any, AsyncIterator, Iterator, List, Literal, Optional, Tuple, TypeVar
+import anyio
+import structlog
+from fastapi import APIRouter, Depends, Header, HTTPException, status, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, or_
+from sqlalchemy import Executable, select, func, tuple_, insert, update, delete, case
 
+from ..config import settings
 from ..database import get_db, Note, User
 from ..auth import get_current_active_user
+from ..replicas import read_session, replica_router
+from ..response_cache import response_cache
+from ..note_import import import_notes
+from ..etags import if_match_tags, if_none_match, note_etag, page_etag, parse_note_etag
+from ..pagination import CursorKey, InvalidCursor, decode_cursor, encode_cursor
+from ..search import SearchClause, build_search_clause, highlight
+from ..serialization import compile_serializer, field_names, render_json
+from ..singleflight import SingleFlight
 from ..schemas import (
-    NoteCreate, NoteUpdate, NoteResponse, 
-    PaginationParams, PaginatedResponse
+    NoteCreate, NoteUpdate, NoteResponse, NoteListItem,
+    PaginationParams, PaginatedResponse,
+    NoteBatchRequest, NoteBatchResponse, NoteBatchItemResult,
+    NoteImportResponse
 )
 
 router = APIRouter()
+logger = structlog.get_logger()
+
+T = TypeVar("T")
+
+# Clients may cache note representations but must revalidate them with the ETag
+CACHE_CONTROL = "private, no-cache"
+
+# Batch items per statement. An update item binds up to 7 parameters (three
+# CASE arms and the IN list), so 100 rows stay under the 999 variables SQLite
+# allows before 3.32
+BATCH_STATEMENT_ROWS = 100
+
+# Reads select plain columns in NoteResponse field order, not ORM objects
+NOTE_COLUMNS = [getattr(Note, name) for name in field_names(NoteResponse)]
+LIST_ITEM_FIELDS = field_names(NoteListItem)
+
+# Rows fetched per server-side cursor round trip while exporting
+EXPORT_CHUNK_SIZE = 500
+
+# Identical concurrent reads of one user share a single query and serialization
+list_flight = SingleFlight("notes_list", enabled=settings.read_coalescing)
+note_flight = SingleFlight("note", enabled=settings.read_coalescing)
+
+
+def _not_modified(etag: str) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    )
+
+
+def _page_response(request: Request, etag: str, body: bytes) -> Response:
+    """Send an already serialized list page, honouring If-None-Match"""
+    if if_none_match(request.headers.get("if-none-match"), etag):
+        return _not_modified(etag)
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    )
+
+
+async def _after_write(user_id: int) -> None:
+    """Keep the writer on the primary and drop their cached list pages and in-flight reads"""
+    replica_router.pin(user_id)
+    # Reads that began before the write must not be shared with requests made after it
+    for flight in (list_flight, note_flight):
+        flight.forget(lambda key: key[0] == user_id)
+    await response_cache.invalidate(user_id)
 
 
 @router.get("/", response_model=PaginatedResponse)
 async def get_notes(
+    request: Request,
     page: int = Query(1, ge=1),
     limit: int = Query(10, ge=1, le=100),
     search: Optional[str] = Query(None),
-    db: AsyncSession = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="Opaque next_cursor from a previous page"),
     current_user: User = Depends(get_current_active_user)
 ):
     """Get user's notes with pagination and search"""
-    offset = (page - 1) * limit
+    # page is irrelevant once a cursor is given
+    params = (None if cursor else page, cursor, limit, search)
+    validator = request.headers.get("if-none-match")
+    etag, body = await list_flight.do(
+        (current_user.id, params, validator),
+        lambda: _load_page(current_user.id, params, validator)
+    )
+    if body is None:
+        return _not_modified(etag)
+    return _page_response(request, etag, body)
+
+
+async def _load_page(user_id: int, params: tuple, validator: Optional[str]) -> Tuple[str, Optional[bytes]]:
+    """ETag and serialized page, or no body when ``validator`` already matches"""
+    page, cursor, limit, search = params
+    
+    # Serve from the per-user page cache
+    cache_key = None
+    if response_cache.enabled:
+        cache_key, cached = await response_cache.get(user_id, params)
+        if cached is not None:
+            etag, body = cached.split(b"\n", 1)
+            return etag.decode(), body
     
+    # The shared execution owns its session: it may outlive the request that started it
+    async with read_session(user_id) as db:
+        return await _query_page(db, user_id, page, cursor, limit, search, validator, cache_key)
+
+
+async def _query_page(
+    db: AsyncSession,
+    user_id: int,
+    page: Optional[int],
+    cursor: Optional[str],
+    limit: int,
+    search: Optional[str],
+    validator: Optional[str],
+    cache_key: Optional[str]
+) -> Tuple[str, Optional[bytes]]:
+    """Query, tag and serialize one list page"""
     # Build query
-    query = select(Note).where(Note.user_id == current_user.id)
+    query = select(*NOTE_COLUMNS).where(Note.user_id == user_id)
     
-    # Add search filter
+    # Add search filter; matches are ordered by relevance first
+    search_clause = None
+    sort_key: List[Any] = [Note.updated_at, Note.id]
     if search:
-        search_filter = or_(
-            Note.title.ilike(f"%{search}%"),
-            Note.content.ilike(f"%{search}%")
-        )
-        query = query.where(search_filter)
+        search_clause = build_search_clause(db.bind.dialect.name, search)
+        query = query.where(search_clause.filter)
+        sort_key.insert(0, search_clause.rank)
+    
+    # Keyset mode: seek past the last seen sort key instead of OFFSET
+    # and skip the COUNT, so deep pages cost the same as the first one
+    if cursor:
+        try:
+            last: Optional[CursorKey] = decode_cursor(cursor)
+        except InvalidCursor:
+            last = None
+        if last is None or (last.rank is None) != (search_clause is None):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+        last_values: List[Any] = [last.updated_at, last.id]
+        if search_clause is not None:
+            last_values.insert(0, last.rank)
+        query = query.where(tuple_(*sort_key) < tuple_(*last_values))
+        total: Optional[int] = None
+        pages: Optional[int] = None
+        page = None
+    else:
+        # Get total count
+        count_query = select(func.count()).select_from(query.subquery())
+        total_result = await db.execute(count_query)
+        total = total_result.scalar_one()
+        
+        # Calculate pages; page is always set outside keyset mode
+        pages = (total + limit - 1) // limit
+        query = query.offset(((page or 1) - 1) * limit)
     
-    # Get total count
-    count_query = select(func.count()).select_from(query.subquery())
-    total_result = await db.execute(count_query)
-    total = total_result.scalar()
+    if search_clause is not None:
+        query = query.add_columns(search_clause.rank.label("rank"))
+        if search_clause.snippet is not None:
+            query = query.add_columns(search_clause.snippet.label("snippet"))
     
-    # Get paginated results
-    query = query.order_by(Note.updated_at.desc()).offset(offset).limit(limit)
+    # Fetch one extra row to know whether there is a next page
+    query = query.order_by(*(column.desc() for column in sort_key)).limit(limit + 1)
     result = await db.execute(query)
-    notes = result.scalars().all()
+    rows = result.all()
+    
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last_row = rows[-1]
+        next_cursor = encode_cursor(
+            last_row.updated_at, last_row.id, last_row.rank if search_clause is not None else None
+        )
+    
+    # Unchanged pages are answered before any serialization happens
+    etag = page_etag(((row.id, row.updated_at) for row in rows), total, page, limit, pages, next_cursor)
+    if if_none_match(validator, etag):
+        return etag, None
     
-    # Calculate pages
-    pages = (total + limit - 1) // limit
+    items = [_list_item_values(row, search, search_clause) for row in rows]
+    body = _serialize_page(items, total, page, limit, pages, next_cursor)
+    if cache_key is not None:
+        await response_cache.set(cache_key, etag.encode() + b"\n" + body)
     
-    return PaginatedResponse(
-        items=notes,
+    return etag, body
+
+
+def _list_item_values(row, search: Optional[str], search_clause: Optional[SearchClause]) -> tuple:
+    """List item field values (NoteListItem order), with rank and snippet for searches"""
+    if search_clause is None:
+        return (*row, None, None)
+    if search_clause.snippet is not None:
+        return tuple(row)
+    assert search is not None
+    return (*row, highlight(row.content or row.title, search))
+
+
+def _serialize_page(items: List[tuple], total, page, limit, pages, next_cursor) -> bytes:
+    """Encode a list page; the fast path never builds pydantic models"""
+    if settings.fast_serialization:
+        return compile_serializer(PaginatedResponse)((items, total, page, limit, pages, next_cursor)).encode()
+    
+    model = PaginatedResponse(
+        items=[NoteListItem(**dict(zip(LIST_ITEM_FIELDS, values))) for values in items],
         total=total,
         page=page,
         limit=limit,
-        pages=pages
+        pages=pages,
+        next_cursor=next_cursor
+    )
+    return render_json(model.model_dump(mode="json"))
+
+
+@router.get("/export")
+async def export_notes(
+    format: Literal["ndjson", "csv"] = Query("ndjson"),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Stream all of the user's notes as NDJSON or CSV"""
+    media_type = "application/x-ndjson" if format == "ndjson" else "text/csv"
+    return StreamingResponse(
+        _export_chunks(current_user.id, format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="notes.{format}"'}
+    )
+
+
+async def _export_chunks(user_id: int, format: str) -> AsyncIterator[bytes]:
+    """Yield encoded chunks from a server-side cursor; memory is bounded by the chunk size"""
+    # The stream owns its session: it outlives the request's dependencies
+    async with read_session(user_id) as session:
+        result = await session.stream(
+            select(*NOTE_COLUMNS)
+            .where(Note.user_id == user_id)
+            .order_by(Note.updated_at.desc(), Note.id.desc())
+            .execution_options(yield_per=EXPORT_CHUNK_SIZE)
+        )
+        exported = 0
+        try:
+            if format == "csv":
+                yield _csv_chunk([field_names(NoteResponse)])
+            serializer = compile_serializer(NoteResponse)
+            async for partition in result.partitions():
+                exported += len(partition)
+                if format == "csv":
+                    yield _csv_chunk(partition)
+                else:
+                    yield "".join([serializer(row) + "\n" for row in partition]).encode()
+        except asyncio.CancelledError:
+            logger.info("Note export cancelled by client", user_id=user_id, exported=exported)
+            raise
+        finally:
+            # After a disconnect this scope is already cancelled; shield the cleanup so the
+            # server-side cursor and the connection are released rather than cancelled again
+            with anyio.CancelScope(shield=True):
+                await result.close()
+                await session.close()
+
+
+def _csv_chunk(rows) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(
+        [value.isoformat() if isinstance(value, datetime) else value for value in row]
+        for row in rows
     )
+    return buffer.getvalue().encode()
 
 
 @router.get("/{note_id}", response_model=NoteResponse)
 async def get_note(
     note_id: int,
-    db: AsyncSession = Depends(get_db),
+    request: Request,
     current_user: User = Depends(get_current_active_user)
 ):
     """Get a specific note by ID"""
-    result = await db.execute(
-        select(Note).where(
-            Note.id == note_id,
-            Note.user_id == current_user.id
-        )
+    validator = request.headers.get("if-none-match")
+    etag, body = await note_flight.do(
+        (current_user.id, note_id, validator),
+        lambda: _load_note(current_user.id, note_id, validator)
+    )
+    if body is None:
+        return _not_modified(etag)
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={"ETag": etag, "Cache-Control": CACHE_CONTROL}
     )
-    note = result.scalar_one_or_none()
+
+
+async def _load_note(user_id: int, note_id: int, validator: Optional[str]) -> Tuple[str, Optional[bytes]]:
+    """ETag and serialized note, or no body when ``validator`` already matches"""
+    async with read_session(user_id) as db:
+        result = await db.execute(
+            select(*NOTE_COLUMNS).where(
+                Note.id == note_id,
+                Note.user_id == user_id
+            )
+        )
+        note = result.one_or_none()
     
     if not note:
         raise HTTPException(
@@ -82,59 +324,203 @@ async def get_note(
             detail="Note not found"
         )
     
-    return note
+    etag = note_etag(note.id, note.updated_at)
+    if if_none_match(validator, etag):
+        return etag, None
+    
+    if settings.fast_serialization:
+        return etag, compile_serializer(NoteResponse)(note).encode()
+    return etag, render_json(NoteResponse(**note._mapping).model_dump(mode="json"))
 
 
 @router.post("/", response_model=NoteResponse, status_code=status.HTTP_201_CREATED)
 async def create_note(
     note_data: NoteCreate,
+    response: Response,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Create a new note"""
-    db_note = Note(
-        title=note_data.title,
-        content=note_data.content,
-        user_id=current_user.id
-    )
-    
-    db.add(db_note)
+    db_note = (await db.scalars(
+        insert(Note)
+        .values(
+            title=note_data.title,
+            content=note_data.content,
+            user_id=current_user.id
+        )
+        .returning(Note)
+    )).one()
     await db.commit()
-    await db.refresh(db_note)
+    await _after_write(current_user.id)
     
+    response.headers["ETag"] = note_etag(db_note.id, db_note.updated_at)
     return db_note
 
 
+def _statement_chunks(items: List[T]) -> Iterator[List[T]]:
+    """Split batch items so each statement stays under SQLite's bind parameter limit"""
+    for start in range(0, len(items), BATCH_STATEMENT_ROWS):
+        yield items[start:start + BATCH_STATEMENT_ROWS]
+
+
+@router.post("/batch", response_model=NoteBatchResponse)
+async def batch_notes(
+    batch: NoteBatchRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Create, update and delete many notes in a single transaction"""
+    now = datetime.utcnow()
+    
+    # Multi-row INSERT ... RETURNING for the new notes, one per chunk
+    created: List[NoteBatchItemResult] = []
+    for creates in _statement_chunks(batch.create):
+        result = await db.scalars(
+            insert(Note).returning(Note, sort_by_parameter_order=True),
+            [
+                {
+                    "title": item.title,
+                    "content": item.content,
+                    "user_id": current_user.id,
+                    "created_at": now,
+                    "updated_at": now
+                }
+                for item in creates
+            ]
+        )
+        created.extend(
+            NoteBatchItemResult(id=note.id, status="created", note=NoteResponse.model_validate(note))
+            for note in result.all()
+        )
+    
+    # UPDATE ... RETURNING per chunk; per-note values are selected with CASE on the id
+    updated: List[NoteBatchItemResult] = []
+    for updates in _statement_chunks(batch.update):
+        values = {}
+        for field in ("title", "content"):
+            changes = {
+                item.id: getattr(item, field)
+                for item in updates
+                if field in item.model_fields_set
+            }
+            if changes:
+                values[field] = case(changes, value=Note.id, else_=getattr(Note, field))
+        changed_ids = [item.id for item in updates if item.model_fields_set - {"id"}]
+        if changed_ids:
+            values["updated_at"] = case(
+                {note_id: now for note_id in changed_ids},
+                value=Note.id,
+                else_=Note.updated_at
+            )
+        
+        ids = [item.id for item in updates]
+        query: Executable = select(Note).where(Note.user_id == current_user.id, Note.id.in_(ids))
+        if values:
+            query = (
+                update(Note)
+                .where(Note.user_id == current_user.id, Note.id.in_(ids))
+                .values(**values)
+                .returning(Note)
+                .execution_options(synchronize_session=False)
+            )
+        notes = {note.id: note for note in (await db.scalars(query)).all()}
+        updated.extend(
+            NoteBatchItemResult(id=note_id, status="updated", note=NoteResponse.model_validate(notes[note_id]))
+            if note_id in notes else NoteBatchItemResult(id=note_id, status="not_found")
+            for note_id in ids
+        )
+    
+    # DELETE ... RETURNING id per chunk
+    deleted: List[NoteBatchItemResult] = []
+    for delete_ids in _statement_chunks(list(dict.fromkeys(batch.delete))):
+        result = await db.scalars(
+            delete(Note)
+            .where(Note.user_id == current_user.id, Note.id.in_(delete_ids))
+            .returning(Note.id)
+        )
+        deleted_ids = set(result.all())
+        deleted.extend(
+            NoteBatchItemResult(id=note_id, status="deleted" if note_id in deleted_ids else "not_found")
+            for note_id in delete_ids
+        )
+    
+    await db.commit()
+    await _after_write(current_user.id)
+    
+    return NoteBatchResponse(created=created, updated=updated, deleted=deleted)
+
+
+@router.post("/import", response_model=NoteImportResponse)
+async def import_notes_ndjson(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Bulk import notes from an NDJSON body (one NoteCreate object per line)"""
+    result = await import_notes(db, current_user.id, request.stream())
+    if result.imported:
+        await db.commit()
+        await _after_write(current_user.id)
+    logger.info("Notes imported", user_id=current_user.id, imported=result.imported, failed=result.failed)
+    return result
+
+
 @router.put("/{note_id}", response_model=NoteResponse)
 async def update_note(
     note_id: int,
     note_data: NoteUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Update a note"""
-    result = await db.execute(
-        select(Note).where(
-            Note.id == note_id,
-            Note.user_id == current_user.id
+    conditions = [Note.id == note_id, Note.user_id == current_user.id]
+    
+    # Optimistic concurrency: the ETag carries updated_at, so If-Match becomes part
+    # of the UPDATE's WHERE clause and a concurrent edit can't slip in between
+    if if_match:
+        tags = if_match_tags(if_match)
+        if tags is not None:
+            versions = [
+                version[1]
+                for version in map(parse_note_etag, tags)
+                if version is not None and version[0] == note_id
+            ]
+            conditions.append(Note.updated_at.in_(versions))
+    
+    # Single UPDATE ... RETURNING; with nothing to change just read the note
+    update_data = note_data.model_dump(exclude_unset=True)
+    query: Executable
+    if update_data:
+        query = (
+            update(Note)
+            .where(*conditions)
+            .values(**update_data)
+            .returning(Note)
+            .execution_options(synchronize_session=False)
         )
-    )
-    note = result.scalar_one_or_none()
+    else:
+        query = select(Note).where(*conditions)
+    note = await db.scalar(query)
     
     if not note:
+        if len(conditions) > 2 and await db.scalar(
+            select(Note.id).where(Note.id == note_id, Note.user_id == current_user.id)
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_412_PRECONDITION_FAILED,
+                detail="Note was modified"
+            )
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Note not found"
         )
     
-    # Update fields
-    update_data = note_data.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(note, field, value)
-    
     await db.commit()
-    await db.refresh(note)
+    await _after_write(current_user.id)
     
+    response.headers["ETag"] = note_etag(note.id, note.updated_at)
     return note
 
 
@@ -145,19 +531,17 @@ async def delete_note(
     current_user: User = Depends(get_current_active_user)
 ):
     """Delete a note"""
-    result = await db.execute(
-        select(Note).where(
-            Note.id == note_id,
-            Note.user_id == current_user.id
-        )
+    deleted_id = await db.scalar(
+        delete(Note)
+        .where(Note.id == note_id, Note.user_id == current_user.id)
+        .returning(Note.id)
     )
-    note = result.scalar_one_or_none()
     
-    if not note:
+    if deleted_id is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Note not found"
         )
     
-    await db.delete(note)
     await db.commit()
+    await _after_write(current_user.id)
@@ -2,8 +2,8 @@
 Pydantic schemas for request/response validation
 """
 
-from pydantic import BaseModel, EmailStr, Field
-from typing import Optional, List
+from pydantic import BaseModel, EmailStr, Field, model_validator
+from typing import Literal, Optional, List
 from datetime import datetime
 
 
@@ -52,6 +52,50 @@ class NoteResponse(NoteBase):
         from_attributes = True
 
 
+# Batch schemas
+BATCH_MAX_ITEMS = 500
+
+
+class NoteBatchUpdate(NoteUpdate):
+    id: int
+
+
+class NoteBatchRequest(BaseModel):
+    create: List[NoteCreate] = Field(default_factory=list, max_length=BATCH_MAX_ITEMS)
+    update: List[NoteBatchUpdate] = Field(default_factory=list, max_length=BATCH_MAX_ITEMS)
+    delete: List[int] = Field(default_factory=list, max_length=BATCH_MAX_ITEMS)
+    
+    @model_validator(mode="after")
+    def check_unique_update_ids(self):
+        ids = [item.id for item in self.update]
+        if len(ids) != len(set(ids)):
+            raise ValueError("Each note id may appear only once in update")
+        return self
+
+
+class NoteBatchItemResult(BaseModel):
+    id: int
+    status: Literal["created", "updated", "deleted", "not_found"]
+    note: Optional[NoteResponse] = None
+
+
+class NoteBatchResponse(BaseModel):
+    created: List[NoteBatchItemResult]
+    updated: List[NoteBatchItemResult]
+    deleted: List[NoteBatchItemResult]
+
+
+class NoteImportError(BaseModel):
+    line: int
+    error: str
+
+
+class NoteImportResponse(BaseModel):
+    imported: int
+    failed: int
+    errors: List[NoteImportError]
+
+
 # Authentication schemas
 class Token(BaseModel):
     access_token: str
@@ -73,9 +117,17 @@ class PaginationParams(BaseModel):
     limit: int = Field(10, ge=1, le=100)
 
 
+class NoteListItem(NoteResponse):
+    # Only populated when the list is filtered by a search term
+    rank: Optional[float] = None
+    snippet: Optional[str] = None
+
+
 class PaginatedResponse(BaseModel):
-    items: List[NoteResponse]
-    total: int
-    page: int
+    items: List[NoteListItem]
+    # total/page/pages are only computed for offset pagination; cursor pages skip the count
+    total: Optional[int] = None
+    page: Optional[int] = None
     limit: int
-    pages: int
+    pages: Optional[int] = None
+    next_cursor: Optional[str] = None
@@ -0,0 +1,116 @@
+"""
+Full-text search for notes
+
+PostgreSQL uses the generated ``notes.search_vector`` tsvector column (GIN
+indexed) with prefix matching, ``ts_rank_cd`` ranking and ``ts_headline``
+snippets. Other dialects (SQLite in tests/local dev) fall back to a
+case-insensitive substring match with the same response shape.
+
+Snippets are HTML: the note text is escaped and only the ``<mark>`` tags
+around matches are markup, so clients can render them as-is.
+"""
+
+import html
+import re
+from typing import Any, List, NamedTuple, Optional
+
+from sqlalchemy import case, false, func, literal_column
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.sql.elements import ColumnElement
+
+from .database import Note
+
+# Text search configuration baked into the generated column (see database.py)
+SEARCH_CONFIG = "simple"
+
+HEADLINE_OPTIONS = "StartSel=<mark>, StopSel=</mark>, MaxWords=35, MinWords=15, MaxFragments=2"
+SNIPPET_WIDTH = 160
+
+search_vector = literal_column("notes.search_vector", type_=TSVECTOR)
+search_config: ColumnElement[Any] = literal_column(f"'{SEARCH_CONFIG}'::regconfig")
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+class SearchClause(NamedTuple):
+    """SQL pieces needed to filter, rank and highlight a search"""
+    filter: ColumnElement
+    rank: ColumnElement
+    snippet: Optional[ColumnElement]
+
+
+def escape_html_sql(text: ColumnElement) -> ColumnElement:
+    """SQL equivalent of ``html.escape`` (quotes included)"""
+    for char, entity in (("&", "&amp;"), ("<", "&lt;"), (">", "&gt;"), ('"', "&quot;"), ("'", "&#x27;")):
+        text = func.replace(text, char, entity)
+    return text
+
+
+def build_prefix_tsquery(search: str) -> Optional[str]:
+    """Turn free text into a tsquery matching every word as a prefix"""
+    tokens = _TOKEN_RE.findall(search.lower())
+    if not tokens:
+        return None
+    return " & ".join(f"{token}:*" for token in tokens)
+
+
+def build_search_clause(dialect_name: str, search: str) -> SearchClause:
+    """Build the search filter/rank/snippet expressions for a dialect"""
+    if dialect_name == "postgresql":
+        tsquery_text = build_prefix_tsquery(search)
+        if tsquery_text is None:
+            return SearchClause(filter=false(), rank=literal_column("0.0"), snippet=None)
+
+        tsquery = func.to_tsquery(search_config, tsquery_text)
+        # Escaped first, so tags stored in notes reach the client as text
+        snippet = func.ts_headline(
+            search_config,
+            escape_html_sql(func.coalesce(func.nullif(Note.content, ""), Note.title)),
+            tsquery,
+            HEADLINE_OPTIONS
+        )
+        return SearchClause(
+            filter=search_vector.op("@@")(tsquery),
+            rank=func.ts_rank_cd(search_vector, tsquery),
+            snippet=snippet
+        )
+
+    # Fallback: substring match, title hits ranked above content-only hits
+    title_match = Note.title.icontains(search, autoescape=True)
+    return SearchClause(
+        filter=title_match | Note.content.icontains(search, autoescape=True),
+        rank=case((title_match, 2.0), else_=1.0),
+        snippet=None
+    )
+
+
+def highlight(text: Optional[str], search: str, width: int = SNIPPET_WIDTH) -> Optional[str]:
+    """Python snippet builder used when the database cannot highlight; returns escaped HTML"""
+    if not text:
+        return None
+
+    lowered = text.lower()
+    needle = search.lower()
+    position = lowered.find(needle) if needle else -1
+    if position < 0:
+        return html.escape(text[:width])
+
+    start = max(0, position - width // 2)
+    end = min(len(text), start + width)
+    window = text[start:end]
+
+    parts: List[str] = []
+    cursor = 0
+    lowered_window = window.lower()
+    while True:
+        found = lowered_window.find(needle, cursor)
+        if found < 0:
+            parts.append(html.escape(window[cursor:]))
+            break
+        parts.append(html.escape(window[cursor:found]))
+        parts.append(f"<mark>{html.escape(window[found:found + len(needle)])}</mark>")
+        cursor = found + len(needle)
+
+    prefix = "..." if start > 0 else ""
+    suffix = "..." if end < len(text) else ""
+    return f"{prefix}{''.join(parts)}{suffix}"
@@ -0,0 +1,65 @@
+"""
+Production launcher: N uvicorn workers sharing one listening socket
+
+The supervisor binds the socket once and starts each worker with
+``create_app``; every worker builds its own database engine at startup and
+drains and disposes it on shutdown.
+
+Caches stay per process. Most only risk bounded staleness (principals, tokens,
+replica pins), but a memory-backed list-page cache would keep serving pages a
+write on another worker invalidated, so with several workers the launcher
+turns it off in the workers unless it lives in Redis.
+
+Usage: python -m src.server [--workers N] [--host HOST] [--port PORT]
+"""
+
+import argparse
+import os
+from typing import Dict, List, Optional
+
+import structlog
+import uvicorn
+
+from .config import settings
+
+logger = structlog.get_logger()
+
+
+def worker_environment(workers: int) -> Dict[str, str]:
+    """Setting overrides the worker processes inherit"""
+    if workers > 1 and settings.response_cache_backend == "memory" and settings.response_cache_ttl_seconds > 0:
+        return {"RESPONSE_CACHE_TTL_SECONDS": "0"}
+    return {}
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Run the Notes API with multiple worker processes")
+    parser.add_argument("--workers", type=int, default=settings.workers or os.cpu_count() or 1,
+                        help="worker processes (default: WORKERS, or one per CPU)")
+    parser.add_argument("--host", default=settings.host)
+    parser.add_argument("--port", type=int, default=settings.port)
+    args = parser.parse_args(argv)
+
+    overrides = worker_environment(args.workers)
+    if overrides:
+        logger.warning(
+            "Memory page cache disabled: writes would only invalidate one worker's pages",
+            workers=args.workers, hint="set RESPONSE_CACHE_BACKEND=redis to keep it",
+        )
+        # Spawned workers read their settings from the environment
+        os.environ.update(overrides)
+
+    uvicorn.run(
+        "src.main:create_app",
+        factory=True,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        timeout_graceful_shutdown=settings.graceful_shutdown_seconds,
+        proxy_headers=True,
+        forwarded_allow_ips=settings.forwarded_allow_ips,
+    )
+
+
+if __name__ == "__main__":
+    main()
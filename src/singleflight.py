@@ -0,0 +1,73 @@
+"""
+Request coalescing for identical concurrent reads
+
+``SingleFlight.do(key, fn)`` runs ``fn`` once per key at a time: callers that
+arrive while an execution for the same key is in flight await its result
+instead of starting their own. The execution runs as its own task, so a caller
+that disconnects never cancels it for the others; once it finishes the key is
+released, and later callers start a fresh execution (nothing is cached).
+Every caller is credited with the execution's queries, so each request's
+``Server-Timing`` shows the queries behind its response.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple, TypeVar
+
+from .metrics import Counter, registry
+from .query_stats import QueryStats, collect, credit
+
+T = TypeVar("T")
+
+coalesced_requests_total = registry.register(Counter(
+    "coalesced_requests_total", "Requests served by joining an identical in-flight read", ("flight",)
+))
+
+
+class SingleFlight:
+    """Share one in-flight execution among concurrent callers with the same key"""
+
+    def __init__(self, name: str, enabled: bool = True):
+        self.name = name
+        self.enabled = enabled
+        self._calls: Dict[Hashable, "asyncio.Future[Tuple[Any, QueryStats]]"] = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        if not self.enabled:
+            return await fn()
+
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(collect(fn))
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._release(key, done))
+            self.executions += 1
+        else:
+            self.coalesced += 1
+            coalesced_requests_total.inc(self.name)
+        result, stats = await asyncio.shield(task)
+        credit(stats)
+        return result
+
+    def _release(self, key: Hashable, task: "asyncio.Future[Any]") -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # Retrieved here so an error nobody is left waiting for is not logged as unhandled
+            task.exception()
+
+    def forget(self, match: Callable[[Any], bool]) -> None:
+        """Make later callers of matching keys start a fresh execution; current waiters still get theirs"""
+        for key in [key for key in self._calls if match(key)]:
+            del self._calls[key]
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": len(self._calls),
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+        }
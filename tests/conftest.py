@@ -0,0 +1,72 @@
+"""
+Shared test fixtures
+"""
+
+import os
+from contextlib import contextmanager
+
+# The whole suite logs in as one user from one client address; the rate
+# limiters have their own tests
+os.environ.setdefault("RATE_LIMIT_USER_RATE", "0")
+os.environ.setdefault("RATE_LIMIT_AUTH_IP_RATE", "0")
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+from src.database import get_engine  # noqa: E402
+from src.main import app  # noqa: E402
+
+
+@pytest.fixture
+def client():
+    """Test client fixture"""
+    return TestClient(app)
+
+
+@pytest.fixture
+def auth_headers(client):
+    """Get authentication headers"""
+    login_data = {
+        "username": "admin",
+        "password": "admin123"
+    }
+    
+    response = client.post("/auth/token", json=login_data)
+    token = response.json()["access_token"]
+    
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def count_queries():
+    """Collect the SQL statements executed inside the returned context manager"""
+    @contextmanager
+    def counter():
+        statements = []
+        
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        
+        engine = get_engine()
+        event.listen(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    
+    return counter
+
+
+@pytest.fixture
+def assert_max_queries(count_queries):
+    """Fail if the block issues more than ``limit`` SQL statements"""
+    @contextmanager
+    def budget(limit: int):
+        with count_queries() as statements:
+            yield statements
+        assert len(statements) <= limit, (
+            f"{len(statements)} queries, budget is {limit}:\n" + "\n".join(statements)
+        )
+    
+    return budget
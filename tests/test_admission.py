@@ -0,0 +1,72 @@
+"""
+Admission control (load shedding) tests
+"""
+
+import asyncio
+
+import httpx
+
+from src.admission import AdmissionMiddleware
+
+
+class FakePoolMonitor:
+    def __init__(self, wait=0.0):
+        self.wait = wait
+
+    def recent_wait(self, max_age):
+        return self.wait
+
+
+def blocking_app(release: asyncio.Event):
+    async def app(scope, receive, send):
+        await release.wait()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+    return app
+
+
+def test_sheds_beyond_max_in_flight():
+    """Test requests over the in-flight limit get 503 + Retry-After while probes pass"""
+    async def scenario():
+        release = asyncio.Event()
+        middleware = AdmissionMiddleware(
+            blocking_app(release), max_in_flight=2, retry_after=3, exempt_paths=("/livez",)
+        )
+        transport = httpx.ASGITransport(app=middleware)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            held = [asyncio.create_task(client.get("/notes/")) for _ in range(2)]
+            while middleware.in_flight < 2:
+                await asyncio.sleep(0.01)
+            
+            shed = await client.get("/notes/")
+            probe = asyncio.create_task(client.get("/livez"))
+            release.set()
+            responses = await asyncio.gather(*held, probe)
+            after = await client.get("/notes/")
+        return shed, responses, after, middleware.in_flight
+    
+    shed, responses, after, in_flight = asyncio.run(scenario())
+    assert shed.status_code == 503
+    assert shed.headers["retry-after"] == "3"
+    assert shed.json() == {"detail": "Service overloaded, retry later"}
+    assert [response.status_code for response in responses] == [200, 200, 200]
+    assert after.status_code == 200
+    assert in_flight == 0
+
+
+def test_sheds_while_pool_checkouts_wait():
+    """Test the pool wait signal sheds until it drops below the threshold"""
+    release = asyncio.Event()
+    release.set()
+    monitor = FakePoolMonitor(wait=0.8)
+    middleware = AdmissionMiddleware(blocking_app(release), pool_monitor=monitor, max_pool_wait_ms=500)
+    
+    async def get():
+        transport = httpx.ASGITransport(app=middleware)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get("/notes/")
+    
+    assert asyncio.run(get()).status_code == 503
+    monitor.wait = 0.1
+    assert asyncio.run(get()).status_code == 200
+
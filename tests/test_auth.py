@@ -101,3 +101,19 @@ def test_protected_endpoint_with_token(client):
     headers = {"Authorization": f"Bearer {token}"}
     response = client.get("/notes/", headers=headers)
     assert response.status_code == 200
+
+
+def test_register_duplicate_email_single_statement(client, count_queries):
+    """Test that a duplicate email is rejected by the single registration INSERT"""
+    user_data = {
+        "username": "someoneelse",
+        "email": "admin@example.com",
+        "password": "testpass123"
+    }
+    
+    with count_queries() as statements:
+        response = client.post("/auth/register", json=user_data)
+    
+    assert response.status_code == 400
+    assert "Email already registered" in response.json()["detail"]
+    assert len(statements) == 1
@@ -0,0 +1,100 @@
+"""
+Cache tests
+"""
+
+import asyncio
+import hashlib
+import time
+import uuid
+from datetime import timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from src.auth import create_access_token, decode_access_token, principal_cache, token_cache
+from src.cache import TTLCache
+from src.database import AsyncSessionLocal, User
+from src.main import app
+
+
+def test_lru_eviction():
+    """Test that the least recently used entry is evicted first"""
+    cache = TTLCache(max_size=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_expiry_and_stats():
+    """Test that entries expire and hits/misses are counted"""
+    cache = TTLCache(max_size=10, ttl=60)
+    cache.set("short", "value", ttl=0.01)
+    cache.set("long", "value")
+    time.sleep(0.02)
+    
+    assert cache.get("short") is None
+    assert cache.get("long") == "value"
+    
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["size"] == 1
+
+
+def test_disabled_cache():
+    """Test that a zero TTL disables caching"""
+    cache = TTLCache(max_size=10, ttl=0)
+    cache.set("key", "value")
+    assert cache.get("key") is None
+
+
+def test_principal_invalidated_on_user_deactivation():
+    """Test that deactivating a cached user takes effect immediately"""
+    client = TestClient(app)
+    # Deactivation is permanent, so every run needs a user of its own
+    username = f"cacheduser_{uuid.uuid4().hex[:8]}"
+    client.post("/auth/register", json={
+        "username": username,
+        "email": f"{username}@example.com",
+        "password": "testpass123"
+    })
+    token = client.post("/auth/token", json={
+        "username": username,
+        "password": "testpass123"
+    }).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    
+    assert client.get("/notes/", headers=headers).status_code == 200
+    assert principal_cache.get(username) is not None
+    
+    async def deactivate():
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(select(User).where(User.username == username))
+            result.scalar_one().is_active = False
+            await db.commit()
+    
+    asyncio.run(deactivate())
+    
+    response = client.get("/notes/", headers=headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Inactive user"
+
+
+def test_token_cache_respects_expiry():
+    """Test that verified tokens are cached no longer than their exp"""
+    token = create_access_token({"sub": "admin"}, expires_delta=timedelta(seconds=5))
+    hits = token_cache.hits
+    
+    assert decode_access_token(token)["sub"] == "admin"
+    assert decode_access_token(token)["sub"] == "admin"
+    assert token_cache.hits == hits + 1
+    
+    key = hashlib.sha256(token.encode()).digest()
+    expires_at, _ = token_cache._entries[key]
+    assert expires_at - time.monotonic() <= 5
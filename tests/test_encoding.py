@@ -0,0 +1,91 @@
+"""
+Content negotiation and compression tests
+"""
+
+import gzip
+import json
+
+import brotli
+import msgpack
+
+from src.encoding import choose_encoding, wants_msgpack
+
+
+def test_negotiation_helpers():
+    """Test Accept / Accept-Encoding parsing"""
+    assert wants_msgpack("application/msgpack")
+    assert wants_msgpack("application/json;q=0.5, application/x-msgpack")
+    assert not wants_msgpack("application/json, application/msgpack;q=0.9")
+    assert not wants_msgpack("*/*")
+    assert choose_encoding("gzip, br") == "br"
+    assert choose_encoding("br;q=0.5, gzip") == "gzip"
+    assert choose_encoding("*") == "br"
+    assert choose_encoding("identity") is None
+    assert choose_encoding("gzip;q=0") is None
+
+
+def test_msgpack_page_matches_json(client, auth_headers):
+    """Test the MessagePack page carries the same data as the JSON page"""
+    as_json = client.get("/notes/?limit=5", headers=auth_headers)
+    as_msgpack = client.get("/notes/?limit=5", headers={**auth_headers, "Accept": "application/msgpack"})
+    
+    assert as_msgpack.status_code == 200
+    assert as_msgpack.headers["content-type"] == "application/msgpack"
+    assert "Accept" in as_msgpack.headers["vary"]
+    assert msgpack.unpackb(as_msgpack.content) == as_json.json()
+
+
+def test_large_responses_are_compressed(client, auth_headers):
+    """Test bodies above the threshold are compressed and small ones are not"""
+    note = client.post(
+        "/notes/", json={"title": "Big", "content": "compress me " * 500}, headers=auth_headers
+    ).json()
+    
+    for coding, decompress in (("gzip", gzip.decompress), ("br", brotli.decompress)):
+        with client.stream(
+            "GET", f"/notes/{note['id']}", headers={**auth_headers, "Accept-Encoding": coding}
+        ) as response:
+            raw = b"".join(response.iter_raw())
+        assert response.headers["content-encoding"] == coding
+        assert int(response.headers["content-length"]) == len(raw)
+        assert json.loads(decompress(raw))["content"] == note["content"]
+    
+    small = client.get("/", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+
+
+def test_streamed_export_is_compressed(client, auth_headers):
+    """Test streaming responses are compressed on the fly"""
+    with client.stream("GET", "/notes/export", headers={**auth_headers, "Accept-Encoding": "gzip"}) as response:
+        raw = b"".join(response.iter_raw())
+    assert response.headers["content-encoding"] == "gzip"
+    lines = gzip.decompress(raw).decode().splitlines()
+    assert all(json.loads(line)["id"] for line in lines)
+
+
+def test_each_representation_has_its_own_etag(client, auth_headers):
+    """Test JSON, MessagePack and compressed bodies get distinct strong ETags that still revalidate"""
+    note = client.post(
+        "/notes/", json={"title": "Tagged", "content": "represent me " * 500}, headers=auth_headers
+    ).json()
+    url = f"/notes/{note['id']}"
+    variants = {
+        "identity": {"Accept-Encoding": "identity"},
+        "gzip": {"Accept-Encoding": "gzip"},
+        "br": {"Accept-Encoding": "br"},
+        "msgpack": {"Accept-Encoding": "identity", "Accept": "application/msgpack"},
+        "msgpack+gzip": {"Accept-Encoding": "gzip", "Accept": "application/msgpack"},
+    }
+    etags = {name: client.get(url, headers={**auth_headers, **headers}).headers["ETag"]
+             for name, headers in variants.items()}
+    
+    assert len(set(etags.values())) == len(variants)
+    assert not any(etag.startswith("W/") for etag in etags.values())
+    for name, headers in variants.items():
+        cached = client.get(url, headers={**auth_headers, **headers, "If-None-Match": etags[name]})
+        assert cached.status_code == 304
+        assert cached.headers["ETag"] == etags[name]
+    
+    # A conditional update with the tag of any representation matches the note
+    updated = client.put(url, json={"title": "Tagged v2"}, headers={**auth_headers, "If-Match": etags["msgpack+gzip"]})
+    assert updated.status_code == 200
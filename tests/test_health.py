@@ -0,0 +1,103 @@
+"""
+Liveness/readiness probe tests
+"""
+
+import asyncio
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from src.database import get_engine
+from src.health import HealthMonitor, health_monitor
+from src.main import create_app
+
+
+class FakePoolMonitor:
+    def __init__(self, saturation=None):
+        self.value = saturation
+
+    def saturation(self):
+        return self.value
+
+
+def test_readyz_served_from_background_state():
+    """Probes answer without checking out a connection"""
+    with TestClient(create_app()) as client:
+        assert health_monitor.checks >= 1
+        checkouts = []
+
+        def listener(*args):
+            checkouts.append(args)
+
+        event.listen(get_engine().sync_engine, "checkout", listener)
+        try:
+            live = client.get("/livez")
+            ready = client.get("/readyz")
+        finally:
+            event.remove(get_engine().sync_engine, "checkout", listener)
+
+    assert live.status_code == 200
+    assert live.json() == {"status": "ok"}
+    assert ready.status_code == 200
+    assert ready.json()["status"] == "ready"
+    assert ready.json()["database"] == "up"
+    assert checkouts == []
+    # The background task stops with the app
+    assert health_monitor._task is None
+
+
+def test_readyz_starting_before_first_check():
+    """Test a worker is not ready until its first check completes"""
+    monitor = HealthMonitor(FakePoolMonitor())
+    assert monitor.readiness() == (False, {"status": "starting"})
+
+
+def test_readiness_reports_database_down():
+    """Test a failing ping makes the worker not ready and reports the error"""
+    monitor = HealthMonitor(FakePoolMonitor(), timeout=0.5)
+
+    async def failing_ping():
+        raise OSError("connection refused")
+
+    monitor._ping = failing_ping
+    asyncio.run(monitor.check())
+
+    ready, state = monitor.readiness()
+    assert not ready
+    assert state["database"] == "down"
+    assert state["reasons"] == ["database unreachable"]
+    assert state["error"] == "connection refused"
+    assert monitor.failures == 1
+
+
+def test_readiness_times_out_slow_ping():
+    """Test a ping slower than the timeout counts as a failure"""
+    monitor = HealthMonitor(FakePoolMonitor(), timeout=0.05)
+
+    async def slow_ping():
+        await asyncio.sleep(1)
+
+    monitor._ping = slow_ping
+    asyncio.run(monitor.check())
+    assert monitor.readiness()[1]["error"] == "TimeoutError"
+
+
+def test_readiness_pool_saturation_and_staleness():
+    """Test a saturated pool or a stale state makes the worker not ready"""
+    pool = FakePoolMonitor(saturation=1.0)
+    monitor = HealthMonitor(pool, interval=5, max_pool_saturation=1.0)
+    asyncio.run(monitor.check())
+
+    ready, state = monitor.readiness()
+    assert not ready
+    assert state["reasons"] == ["connection pool saturated"]
+
+    pool.value = 0.5
+    asyncio.run(monitor.check())
+    assert monitor.readiness()[0]
+
+    monitor.checked_at -= 16
+    ready, state = monitor.readiness()
+    assert not ready
+    assert state["reasons"] == ["health state stale"]
+
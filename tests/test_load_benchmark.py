@@ -0,0 +1,35 @@
+"""
+Load benchmark reporting tests
+"""
+
+from benchmarks.load import compare, percentile, summarize
+
+
+def test_percentiles_and_summary():
+    """Test nearest-rank percentiles and throughput"""
+    values = [i / 1000 for i in range(1, 101)]
+    assert percentile(values, 0.50) == 0.050
+    assert percentile(values, 0.99) == 0.099
+    assert percentile([], 0.95) == 0.0
+    
+    summary = summarize(values, errors=2, wall_seconds=2.0)
+    assert summary["requests"] == 100
+    assert summary["throughput_rps"] == 50.0
+    assert summary["p95_ms"] == 95.0
+
+
+def test_compare_flags_regressions_beyond_threshold():
+    """Test p95, throughput and error regressions against a baseline"""
+    baseline = {"scenarios": {
+        "get": {"p95_ms": 10.0, "throughput_rps": 100.0, "errors": 0},
+        "list_shallow": {"p95_ms": 20.0, "throughput_rps": 50.0, "errors": 0},
+    }}
+    current = {"scenarios": {
+        "get": {"p95_ms": 10.9, "throughput_rps": 95.0, "errors": 0},
+        "list_shallow": {"p95_ms": 25.0, "throughput_rps": 40.0, "errors": 1},
+        "create": {"p95_ms": 99.0, "throughput_rps": 1.0, "errors": 0},
+    }}
+    
+    regressions = compare(current, baseline, threshold=0.10)
+    assert len(regressions) == 3
+    assert all(regression.startswith("list_shallow") for regression in regressions)
@@ -0,0 +1,65 @@
+"""
+Prometheus metrics tests
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src import boot
+from src.config import settings
+from src.main import create_app
+from src.metrics import Counter, Histogram, Metric, Registry
+
+
+def test_registry_renders_text_format():
+    """Test counters and cumulative histogram buckets in exposition format"""
+    registry = Registry()
+    counter = registry.register(Counter("jobs_total", "Jobs", ("queue",)))
+    histogram = registry.register(Histogram("job_seconds", "Job time", ("queue",), buckets=(0.1, 1.0)))
+    counter.inc("a")
+    counter.inc("a", amount=2)
+    for value in (0.05, 0.5, 3.0):
+        histogram.observe(value, "a")
+    
+    text = registry.render().decode()
+    assert "# TYPE jobs_total counter" in text
+    assert 'jobs_total{queue="a"} 3' in text
+    assert 'job_seconds_bucket{queue="a",le="0.1"} 1' in text
+    assert 'job_seconds_bucket{queue="a",le="1.0"} 2' in text
+    assert 'job_seconds_bucket{queue="a",le="+Inf"} 3' in text
+    assert 'job_seconds_count{queue="a"} 3' in text
+
+
+def test_metric_subclasses_must_render_samples():
+    """Test Metric is abstract until a subclass implements samples()"""
+    with pytest.raises(TypeError):
+        Metric("incomplete", "No samples")
+
+
+def test_first_request_is_marked_without_metrics(monkeypatch):
+    """Test the boot phase is recorded even with METRICS_ENABLED=false"""
+    monkeypatch.setattr(settings, "metrics_enabled", False)
+    monkeypatch.setattr(boot, "phases", {})
+    client = TestClient(create_app())
+    
+    assert client.get("/livez").status_code == 200
+    assert "first_request" in boot.phases
+    assert client.get("/metrics").status_code == 404
+
+
+def test_metrics_endpoint_reports_routes_queries_and_components(client, auth_headers):
+    """Test requests are labelled by route template, not raw path"""
+    client.get("/notes/999999", headers=auth_headers)
+    
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+    assert 'http_requests_total{method="GET",route="/notes/{note_id}",status="404"}' in text
+    assert 'http_request_duration_seconds_count{method="POST",route="/auth/token"}' in text
+    assert "/notes/999999" not in text
+    assert "http_requests_in_flight 1" in text
+    assert 'db_query_duration_seconds_count{engine="primary",operation="select"}' in text
+    assert 'cache_hits_total{cache="token"}' in text
+    assert 'password_hash_pending{executor="thread"} 0' in text
+    assert 'app_boot_seconds{phase="first_request"}' in text
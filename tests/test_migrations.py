@@ -0,0 +1,61 @@
+"""
+Migration and schema version tests
+"""
+
+import asyncio
+
+import pytest
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.database import SCHEMA_VERSION, Base, SchemaVersionMismatch, check_schema_version
+
+
+def test_schema_version_is_the_alembic_head():
+    """Test SCHEMA_VERSION was bumped together with the latest migration"""
+    assert ScriptDirectory.from_config(Config("alembic.ini")).get_heads() == [SCHEMA_VERSION]
+
+
+def test_migrations_match_the_models(tmp_path):
+    """Test upgrading an empty database yields the schema the models describe"""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'migrated.db'}")
+    
+    def upgrade_and_compare(connection):
+        config = Config("alembic.ini")
+        config.attributes["connection"] = connection
+        command.upgrade(config, "head")
+        return compare_metadata(MigrationContext.configure(connection), Base.metadata)
+    
+    async def scenario():
+        # Alembic manages its own transactions (the keyset index uses an autocommit block)
+        async with engine.connect() as conn:
+            differences = await conn.run_sync(upgrade_and_compare)
+        version = await check_schema_version(engine)
+        await engine.dispose()
+        return differences, version
+    
+    differences, version = asyncio.run(scenario())
+    assert differences == []
+    assert version == SCHEMA_VERSION
+
+
+def test_schema_check_fails_fast(tmp_path):
+    """Test startup check rejects unmigrated and outdated databases"""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'stale.db'}")
+    
+    async def scenario():
+        with pytest.raises(SchemaVersionMismatch, match="no alembic_version"):
+            await check_schema_version(engine)
+        async with engine.begin() as conn:
+            await conn.execute(text("CREATE TABLE alembic_version (version_num VARCHAR(32) NOT NULL)"))
+            await conn.execute(text("INSERT INTO alembic_version VALUES ('3f2a9c1d7b10')"))
+        with pytest.raises(SchemaVersionMismatch, match="3f2a9c1d7b10"):
+            await check_schema_version(engine)
+        await engine.dispose()
+    
+    asyncio.run(scenario())
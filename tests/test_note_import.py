@@ -0,0 +1,72 @@
+"""
+NDJSON import tests
+"""
+
+import asyncio
+import os
+import uuid
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from src.database import Base, Note, User, convert_database_url
+from src.note_import import import_notes, iter_lines
+
+# A throwaway PostgreSQL database for the COPY path; SQLite never takes it
+POSTGRES_URL = os.environ.get("TEST_POSTGRES_URL", "")
+
+
+async def _chunks(*parts):
+    for part in parts:
+        yield part
+
+
+def _lines(*parts, max_line_bytes=10):
+    async def collect():
+        return [line async for line in iter_lines(_chunks(*parts), max_line_bytes)]
+    return asyncio.run(collect())
+
+
+def test_lines_split_across_chunks():
+    """Test lines are reassembled regardless of chunk boundaries"""
+    assert _lines(b'{"a"', b':1}\n{"b":2}\n\n', b'{"c":3}') == [
+        (1, b'{"a":1}'), (2, b'{"b":2}'), (3, b""), (4, b'{"c":3}')
+    ]
+
+
+def test_oversized_lines_are_dropped():
+    """Test lines over the limit are reported without being buffered"""
+    assert _lines(b"0123456789", b"abc\nok\n", b"x" * 20) == [(1, None), (2, b"ok"), (3, None)]
+
+
+async def _failing_body(lines_before_failure):
+    for number in range(lines_before_failure):
+        yield f'{{"title": "row {number}", "content": "x"}}\n'.encode()
+    raise RuntimeError("client went away")
+
+
+@pytest.mark.skipif(not POSTGRES_URL, reason="set TEST_POSTGRES_URL to run against PostgreSQL")
+def test_failed_import_on_postgres_leaves_no_rows():
+    """Test COPY chunks join the session's transaction, so a later failure rolls back earlier chunks"""
+    engine = create_async_engine(convert_database_url(POSTGRES_URL))
+
+    async def scenario():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with AsyncSession(engine) as session:
+            user = User(username=f"import_{uuid.uuid4().hex[:8]}", email=f"{uuid.uuid4().hex}@example.com",
+                        hashed_password="x")
+            session.add(user)
+            await session.commit()
+
+            # Two COPY chunks are written before the body fails
+            with pytest.raises(RuntimeError):
+                await import_notes(session, user.id, _failing_body(5), chunk_size=2)
+            await session.rollback()
+
+            count = await session.scalar(select(func.count()).select_from(Note).where(Note.user_id == user.id))
+        await engine.dispose()
+        return count
+
+    assert asyncio.run(scenario()) == 0
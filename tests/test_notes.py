@@ -2,30 +2,18 @@
 Notes API tests
 """
 
-import pytest
-from fastapi.testclient import TestClient
+import csv
+import io
+import json
+import uuid
 
-from src.main import app
+import anyio
+from sqlalchemy import event, select
+from sqlalchemy.dialects import postgresql
 
-
-@pytest.fixture
-def client():
-    """Test client fixture"""
-    return TestClient(app)
-
-
-@pytest.fixture
-def auth_headers(client):
-    """Get authentication headers"""
-    login_data = {
-        "username": "admin",
-        "password": "admin123"
-    }
-    
-    response = client.post("/auth/token", json=login_data)
-    token = response.json()["access_token"]
-    
-    return {"Authorization": f"Bearer {token}"}
+from src.database import AsyncSessionLocal, User, get_engine
+from src.routes import notes as notes_routes
+from src.search import build_search_clause, highlight
 
 
 def test_create_note(client, auth_headers):
@@ -157,3 +145,294 @@ def test_pagination(client, auth_headers):
     assert data["page"] == 1
     assert data["limit"] == 5
     assert len(data["items"]) <= 5
+
+
+def test_cursor_pagination(client, auth_headers):
+    """Test keyset pagination with next_cursor"""
+    for i in range(3):
+        client.post("/notes/", json={"title": f"Cursor Note {i}"}, headers=auth_headers)
+    
+    first = client.get("/notes/?limit=2", headers=auth_headers).json()
+    assert len(first["items"]) == 2
+    assert first["next_cursor"]
+    
+    response = client.get(f"/notes/?limit=2&cursor={first['next_cursor']}", headers=auth_headers)
+    assert response.status_code == 200
+    
+    second = response.json()
+    assert second["total"] is None
+    first_ids = {note["id"] for note in first["items"]}
+    assert not first_ids & {note["id"] for note in second["items"]}
+    assert second["items"][0]["updated_at"] <= first["items"][-1]["updated_at"]
+
+
+def test_invalid_cursor(client, auth_headers):
+    """Test that a malformed cursor is rejected"""
+    response = client.get("/notes/?cursor=not-a-cursor", headers=auth_headers)
+    assert response.status_code == 400
+
+
+def test_search_ranks_and_highlights(client, auth_headers):
+    """Test search results carry rank and a highlighted snippet"""
+    # A word no earlier run's notes contain, since the test database persists
+    term = f"zephyrine{uuid.uuid4().hex[:8]}"
+    client.post("/notes/", json={"title": "Body match", "content": f"mentions {term} here"}, headers=auth_headers)
+    client.post("/notes/", json={"title": f"{term} in title", "content": "other text"}, headers=auth_headers)
+    
+    response = client.get(f"/notes/?search={term}", headers=auth_headers)
+    assert response.status_code == 200
+    
+    items = response.json()["items"]
+    assert len(items) == 2
+    assert items[0]["title"] == f"{term} in title"
+    assert items[0]["rank"] >= items[1]["rank"]
+    assert f"<mark>{term}</mark>" in items[1]["snippet"]
+
+
+def test_search_snippets_escape_note_html(client, auth_headers):
+    """Test note text in snippets is HTML-escaped and only the match markers are markup"""
+    client.post(
+        "/notes/",
+        json={"title": "Xss probe", "content": '<img src=x onerror="alert(1)"> quixotical & more'},
+        headers=auth_headers
+    )
+    
+    response = client.get("/notes/?search=quixotical", headers=auth_headers)
+    snippet = response.json()["items"][0]["snippet"]
+    assert "<img" not in snippet
+    assert snippet.startswith("&lt;img src=x onerror=&quot;alert(1)&quot;&gt;")
+    assert "<mark>quixotical</mark> &amp; more" in snippet
+    assert highlight("<b>bold</b>", "missing") == "&lt;b&gt;bold&lt;/b&gt;"
+    
+    # PostgreSQL escapes the text before ts_headline adds its markers
+    clause = build_search_clause("postgresql", "quixotical")
+    sql = str(clause.snippet.compile(dialect=postgresql.dialect()))
+    assert sql.count("replace(") == 5
+
+
+def test_batch_notes(client, auth_headers):
+    """Test batch create, update and delete in one request"""
+    existing = client.post("/notes/", json={"title": "Batch target"}, headers=auth_headers).json()
+    doomed = client.post("/notes/", json={"title": "Batch doomed"}, headers=auth_headers).json()
+    
+    batch = {
+        "create": [{"title": "Batch A"}, {"title": "Batch B", "content": "b"}],
+        "update": [
+            {"id": existing["id"], "content": "batched content"},
+            {"id": 99999, "title": "Missing"}
+        ],
+        "delete": [doomed["id"], 99998]
+    }
+    response = client.post("/notes/batch", json=batch, headers=auth_headers)
+    assert response.status_code == 200
+    
+    data = response.json()
+    assert [item["note"]["title"] for item in data["created"]] == ["Batch A", "Batch B"]
+    assert data["updated"][0]["status"] == "updated"
+    assert data["updated"][0]["note"]["title"] == "Batch target"
+    assert data["updated"][0]["note"]["content"] == "batched content"
+    assert data["updated"][1]["status"] == "not_found"
+    assert [item["status"] for item in data["deleted"]] == ["deleted", "not_found"]
+    
+    assert client.get(f"/notes/{doomed['id']}", headers=auth_headers).status_code == 404
+
+
+
+def test_batch_statements_fit_sqlite_parameter_limit(client, auth_headers, count_queries):
+    """Test that full-size batches bind at most 999 parameters per statement"""
+    with count_queries() as statements:
+        response = client.post(
+            "/notes/batch",
+            json={"create": [{"title": f"Bulk {i}", "content": "c"} for i in range(500)]},
+            headers=auth_headers
+        )
+        ids = [item["id"] for item in response.json()["created"]]
+        assert len(ids) == 500
+        
+        response = client.post(
+            "/notes/batch",
+            json={
+                "update": [{"id": note_id, "title": "Bulk", "content": "u"} for note_id in ids],
+                "delete": ids
+            },
+            headers=auth_headers
+        )
+    assert response.status_code == 200
+    
+    data = response.json()
+    assert [item["status"] for item in data["updated"]] == ["updated"] * 500
+    assert [item["status"] for item in data["deleted"]] == ["deleted"] * 500
+    assert max(statement.count("?") for statement in statements) <= 999
+
+def test_write_endpoints_use_single_statement(client, auth_headers, count_queries):
+    """Test that create/update/delete each issue exactly one SQL statement"""
+    # Warm the principal cache so auth adds no lookup query
+    client.get("/notes/?limit=1", headers=auth_headers)
+    
+    with count_queries() as statements:
+        note_id = client.post("/notes/", json={"title": "Counted"}, headers=auth_headers).json()["id"]
+    assert len(statements) == 1
+    
+    with count_queries() as statements:
+        response = client.put(f"/notes/{note_id}", json={"title": "Counted again"}, headers=auth_headers)
+    assert response.json()["title"] == "Counted again"
+    assert len(statements) == 1
+    
+    with count_queries() as statements:
+        client.delete(f"/notes/{note_id}", headers=auth_headers)
+    assert len(statements) == 1
+    
+    with count_queries() as statements:
+        response = client.delete(f"/notes/{note_id}", headers=auth_headers)
+    assert response.status_code == 404
+    assert len(statements) == 1
+
+
+def test_conditional_get_note(client, auth_headers):
+    """Test ETag / If-None-Match on a single note"""
+    note_id = client.post("/notes/", json={"title": "ETag note"}, headers=auth_headers).json()["id"]
+    
+    response = client.get(f"/notes/{note_id}", headers=auth_headers)
+    etag = response.headers["ETag"]
+    
+    cached = client.get(f"/notes/{note_id}", headers={**auth_headers, "If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    
+    client.put(f"/notes/{note_id}", json={"title": "ETag note v2"}, headers=auth_headers)
+    fresh = client.get(f"/notes/{note_id}", headers={**auth_headers, "If-None-Match": etag})
+    assert fresh.status_code == 200
+    assert fresh.headers["ETag"] != etag
+
+
+def test_conditional_get_notes_page(client, auth_headers):
+    """Test ETag / If-None-Match on a list page"""
+    etag = client.get("/notes/?limit=5", headers=auth_headers).headers["ETag"]
+    
+    cached = client.get("/notes/?limit=5", headers={**auth_headers, "If-None-Match": etag})
+    assert cached.status_code == 304
+    
+    client.post("/notes/", json={"title": "Invalidates page"}, headers=auth_headers)
+    fresh = client.get("/notes/?limit=5", headers={**auth_headers, "If-None-Match": etag})
+    assert fresh.status_code == 200
+
+
+def test_update_if_match(client, auth_headers):
+    """Test optimistic concurrency with If-Match on PUT"""
+    created = client.post("/notes/", json={"title": "Versioned"}, headers=auth_headers)
+    note_id = created.json()["id"]
+    etag = created.headers["ETag"]
+    
+    first = client.put(
+        f"/notes/{note_id}", json={"title": "Writer A"},
+        headers={**auth_headers, "If-Match": etag}
+    )
+    assert first.status_code == 200
+    
+    stale = client.put(
+        f"/notes/{note_id}", json={"title": "Writer B"},
+        headers={**auth_headers, "If-Match": etag}
+    )
+    assert stale.status_code == 412
+    
+    missing = client.put(
+        "/notes/99999", json={"title": "Nobody"},
+        headers={**auth_headers, "If-Match": etag}
+    )
+    assert missing.status_code == 404
+
+
+def test_export_notes(client, auth_headers):
+    """Test streaming NDJSON and CSV export"""
+    client.post("/notes/", json={"title": "Exported", "content": "line one\nline two"}, headers=auth_headers)
+    total = client.get("/notes/?limit=1", headers=auth_headers).json()["total"]
+    
+    response = client.get("/notes/export", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    notes = [json.loads(line) for line in response.text.splitlines()]
+    assert len(notes) == total
+    assert notes[0]["title"] == "Exported"
+    
+    response = client.get("/notes/export?format=csv", headers=auth_headers)
+    rows = list(csv.reader(io.StringIO(response.text)))
+    assert rows[0][:3] == ["title", "content", "id"]
+    assert len(rows) == total + 1
+
+
+def test_cancelled_export_releases_its_connection(client, auth_headers):
+    """Test a client disconnect mid-export still closes the cursor and returns the connection"""
+    client.post("/notes/", json={"title": "Exported", "content": "x"}, headers=auth_headers)
+    
+    checked_out = []
+    pool_events = {
+        "checkout": lambda *args: checked_out.append(1),
+        "checkin": lambda *args: checked_out.pop(),
+    }
+    
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            user_id = await db.scalar(select(User.id).where(User.username == "admin"))
+        chunks = notes_routes._export_chunks(user_id, "ndjson")
+        with anyio.CancelScope() as scope:
+            await chunks.__anext__()
+            assert checked_out
+            # Like a disconnect: the request's scope is cancelled while the stream is open
+            scope.cancel()
+            await chunks.__anext__()
+    
+    sync_engine = get_engine().sync_engine
+    for name, listener in pool_events.items():
+        event.listen(sync_engine, name, listener)
+    try:
+        anyio.run(scenario)
+    finally:
+        for name, listener in pool_events.items():
+            event.remove(sync_engine, name, listener)
+    assert checked_out == []
+
+
+def test_import_notes(client, auth_headers):
+    """Test NDJSON import writes valid lines and reports invalid ones"""
+    body = "\n".join([
+        '{"title": "Imported 1", "content": "first"}',
+        '',
+        '{"title": ""}',
+        'not json',
+        '{"title": "Imported 2"}',
+    ]) + "\n"
+    total = client.get("/notes/?limit=1", headers=auth_headers).json()["total"]
+    
+    response = client.post(
+        "/notes/import",
+        content=body,
+        headers={**auth_headers, "Content-Type": "application/x-ndjson"}
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["imported"] == 2
+    assert data["failed"] == 2
+    assert [error["line"] for error in data["errors"]] == [3, 4]
+    assert "title" in data["errors"][0]["error"]
+    
+    listing = client.get("/notes/?limit=2", headers=auth_headers).json()
+    assert listing["total"] == total + 2
+    assert {item["title"] for item in listing["items"]} == {"Imported 1", "Imported 2"}
+
+
+def test_query_budgets(client, auth_headers, assert_max_queries):
+    """Test each note endpoint stays within its SQL statement budget"""
+    client.get("/notes/?limit=1", headers=auth_headers)  # warm the principal cache
+    
+    with assert_max_queries(1):
+        note = client.post("/notes/", json={"title": "Budget"}, headers=auth_headers).json()
+    with assert_max_queries(2):
+        client.get("/notes/?limit=10", headers=auth_headers)
+    with assert_max_queries(2):
+        client.get("/notes/?limit=10&search=budget", headers=auth_headers)
+    with assert_max_queries(1):
+        client.get(f"/notes/{note['id']}", headers=auth_headers)
+    with assert_max_queries(1):
+        client.put(f"/notes/{note['id']}", json={"content": "spent"}, headers=auth_headers)
+    with assert_max_queries(1):
+        client.delete(f"/notes/{note['id']}", headers=auth_headers)
@@ -0,0 +1,77 @@
+"""
+Password hashing pool tests
+"""
+
+import asyncio
+import threading
+
+import pytest
+
+from src.passwords import HasherBusy, PasswordHasher
+
+
+def test_hash_and_verify_off_loop():
+    """Test hashing round trip through the worker pool"""
+    hasher = PasswordHasher(workers=1)
+    
+    async def scenario():
+        hashed = await hasher.hash("secret123")
+        return await hasher.verify("secret123", hashed), await hasher.verify("wrong", hashed)
+    
+    try:
+        assert asyncio.run(scenario()) == (True, False)
+    finally:
+        asyncio.run(hasher.shutdown())
+    assert hasher.stats()["pending"] == 0
+
+
+def test_admission_limit_rejects_excess_jobs():
+    """Test that jobs beyond max_pending are rejected instead of queued"""
+    hasher = PasswordHasher(workers=1, max_pending=1)
+    release = threading.Event()
+    
+    async def scenario():
+        blocked = asyncio.ensure_future(hasher.run(release.wait, 5))
+        await asyncio.sleep(0)
+        assert hasher.stats()["pending"] == 1
+        with pytest.raises(HasherBusy):
+            await hasher.hash("secret123")
+        release.set()
+        await blocked
+    
+    try:
+        asyncio.run(scenario())
+    finally:
+        asyncio.run(hasher.shutdown())
+    assert hasher.stats()["rejected"] == 1
+
+
+def test_cancelled_caller_keeps_job_pending_until_it_finishes():
+    """Test a cancelled caller holds its slot until the worker finishes, and failures are not completions"""
+    hasher = PasswordHasher(workers=1, max_pending=1)
+    release = threading.Event()
+    
+    async def scenario():
+        caller = asyncio.ensure_future(hasher.run(release.wait, 5))
+        await asyncio.sleep(0.05)
+        caller.cancel()
+        await asyncio.sleep(0)
+        # The worker is still busy with the job
+        assert hasher.stats()["pending"] == 1
+        with pytest.raises(HasherBusy):
+            await hasher.hash("secret123")
+        
+        release.set()
+        while hasher.stats()["pending"]:
+            await asyncio.sleep(0.01)
+        failed = hasher.run(int, "not a number")
+        with pytest.raises(ValueError):
+            await failed
+    
+    try:
+        asyncio.run(scenario())
+    finally:
+        asyncio.run(hasher.shutdown())
+    assert hasher.stats()["pending"] == 0
+    # Only the cancelled caller's job succeeded
+    assert hasher.stats()["completed"] == 1
@@ -0,0 +1,74 @@
+"""
+Connection pool instrumentation tests
+"""
+
+import asyncio
+
+import pytest
+from sqlalchemy import exc, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.pool import MonitoredQueuePool, PoolMonitor
+
+
+def test_pool_monitor_reports_usage_and_timeouts(tmp_path):
+    """Test checkout waits, in-use count and timeouts are recorded"""
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}",
+        poolclass=MonitoredQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05
+    )
+    monitor = PoolMonitor("test", slow_checkout_ms=10000)
+    monitor.attach(engine)
+    
+    async def scenario():
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            assert monitor.stats()["in_use"] == 1
+            with pytest.raises(exc.TimeoutError):
+                async with engine.connect():
+                    pass
+        await engine.dispose()
+    
+    asyncio.run(scenario())
+    
+    stats = monitor.stats()
+    assert stats["checkouts"] == 1
+    assert monitor.waits == 1
+    assert stats["timeouts"] == 1
+    assert stats["connects"] == 1
+    assert stats["in_use"] == 0
+
+
+def test_pool_monitor_saturation(tmp_path):
+    """Test saturation is checked-out connections over pool_size + max_overflow"""
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}",
+        poolclass=MonitoredQueuePool,
+        pool_size=1,
+        max_overflow=1
+    )
+    monitor = PoolMonitor("test")
+    assert monitor.saturation() is None
+    monitor.attach(engine)
+    
+    async def scenario():
+        assert monitor.saturation() == 0
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            assert monitor.saturation() == 0.5
+        await engine.dispose()
+    
+    asyncio.run(scenario())
+
+
+def test_pool_monitor_recent_wait_expires():
+    """Test the checkout wait average only counts while checkouts keep happening"""
+    monitor = PoolMonitor("test", slow_checkout_ms=10000)
+    assert monitor.recent_wait(max_age=5) == 0
+    monitor.record_wait(1.0)
+    assert monitor.recent_wait(max_age=5) > 0
+    monitor.wait_ewma_at -= 10
+    assert monitor.recent_wait(max_age=5) == 0
@@ -0,0 +1,43 @@
+"""
+Request profiling middleware tests
+"""
+
+from fastapi.testclient import TestClient
+
+from src.main import app
+from src.profiling import ProfilingMiddleware
+
+
+def test_profiling_is_not_installed_by_default():
+    """Test the middleware adds nothing unless PROFILING_ENABLED is set"""
+    assert all(middleware.cls is not ProfilingMiddleware for middleware in app.user_middleware)
+
+
+def test_inline_profile_requires_the_token(tmp_path):
+    """Test only the configured token triggers an inline report"""
+    client = TestClient(ProfilingMiddleware(app, token="s3cret", output_dir=str(tmp_path)))
+    
+    response = client.get("/", headers={"X-Profile": "wrong", "X-Profile-Output": "inline"})
+    assert response.json()["message"] == "Notes API"
+    
+    response = client.get("/", headers={"X-Profile": "s3cret", "X-Profile-Output": "inline"})
+    assert response.status_code == 200
+    assert response.headers["x-profiled-status"] == "200"
+    assert "GET / -> 200" in response.text
+    assert "function calls" in response.text
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_profiles_are_written_to_the_output_dir(tmp_path):
+    """Test header-triggered and sampled profiles are dumped as .prof files"""
+    client = TestClient(ProfilingMiddleware(app, token="s3cret", output_dir=str(tmp_path)))
+    response = client.get("/", headers={"X-Profile": "s3cret"})
+    assert response.json()["message"] == "Notes API"
+    
+    sampled = TestClient(ProfilingMiddleware(app, sample_rate=1.0, output_dir=str(tmp_path)))
+    sampled.get("/health")
+    
+    profiles = sorted(path.name for path in tmp_path.iterdir())
+    assert len(profiles) == 2
+    assert all(name.endswith(".prof") for name in profiles)
+    assert any("-GET-health-" in name for name in profiles)
@@ -0,0 +1,79 @@
+"""
+Per-request SQL instrumentation tests
+"""
+
+import asyncio
+
+import pytest
+from sqlalchemy import exc, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src import query_stats
+from src.config import settings
+from src.query_stats import QueryStats, instrument_engine, redact_parameters
+
+
+def test_redact_parameters_keeps_only_types():
+    """Test values never reach the slow-query log"""
+    assert redact_parameters({"password": "secret", "id": 3}) == {"password": "<str>", "id": "<int>"}
+    assert redact_parameters(("secret", 3)) == ["<str>", "<int>"]
+    assert redact_parameters([("a", 1), ("b", 2)]) == "<2 rows>"
+
+
+def test_server_timing_reports_request_queries(client):
+    """Test the Server-Timing header carries the request's query count and DB time"""
+    response = client.post("/auth/token", json={"username": "admin", "password": "admin123"})
+    
+    server_timing = response.headers["server-timing"]
+    assert server_timing.startswith("db;dur=")
+    assert 'desc="1 query"' in server_timing
+    assert "app;dur=" in server_timing
+
+
+def test_slow_queries_are_logged_redacted(client, monkeypatch):
+    """Test statements over the threshold are logged with redacted parameters"""
+    logged = []
+    
+    class RecordingLogger:
+        def warning(self, event, **fields):
+            logged.append((event, fields))
+        
+        def debug(self, event, **fields):
+            pass
+    
+    monkeypatch.setattr(query_stats, "logger", RecordingLogger())
+    monkeypatch.setattr(settings, "slow_query_ms", 0.000001)
+    
+    client.post("/auth/token", json={"username": "admin", "password": "admin123"})
+    
+    event, fields = logged[0]
+    assert event == "Slow query"
+    assert fields["engine"] == "primary"
+    assert "users" in fields["statement"]
+    assert "admin" not in repr(fields["parameters"])
+
+
+def test_failed_statements_leave_no_state_on_the_connection(tmp_path):
+    """Test a statement that raises is not left behind on the pooled connection"""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'stats.db'}")
+    instrument_engine(engine, "test")
+    stats = QueryStats()
+    
+    async def scenario():
+        token = query_stats._current.set(stats)
+        try:
+            async with engine.connect() as conn:
+                await conn.execute(text("CREATE TABLE t (id INTEGER PRIMARY KEY)"))
+                await conn.execute(text("INSERT INTO t VALUES (1)"))
+                for _ in range(3):
+                    with pytest.raises(exc.IntegrityError):
+                        await conn.execute(text("INSERT INTO t VALUES (1)"))
+                await conn.execute(text("SELECT 1"))
+                info = dict(conn.sync_connection.connection.info)
+        finally:
+            query_stats._current.reset(token)
+            await engine.dispose()
+        return info
+    
+    assert asyncio.run(scenario()) == {}
+    assert stats.count == 3
@@ -0,0 +1,91 @@
+"""
+Rate limiting tests
+"""
+
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from src import rate_limit
+from src.rate_limit import InMemoryLimiterBackend, RateLimiter
+
+
+def test_token_bucket_allows_burst_then_reports_wait(monkeypatch):
+    """Test a full bucket admits `burst` requests and then the time to the next token"""
+    now = [100.0]
+    monkeypatch.setattr(rate_limit.time, "monotonic", lambda: now[0])
+    backend = InMemoryLimiterBackend()
+    
+    async def take():
+        return await backend.take("k", rate=2.0, burst=3)
+    
+    assert [asyncio.run(take()) for _ in range(3)] == [0, 0, 0]
+    assert asyncio.run(take()) == pytest.approx(0.5)
+    
+    now[0] += 0.5
+    assert asyncio.run(take()) == 0
+    now[0] += 10
+    assert [asyncio.run(take()) for _ in range(3)] == [0, 0, 0]
+    assert asyncio.run(take()) > 0
+
+
+def test_rate_limiter_raises_429_with_retry_after():
+    """Test rejections carry a whole-second Retry-After and keys are independent"""
+    limiter = RateLimiter(InMemoryLimiterBackend(), "test", rate=0.1, burst=1)
+    
+    async def scenario():
+        await limiter.check(1)
+        await limiter.check(2)
+        with pytest.raises(HTTPException) as error:
+            await limiter.check(1)
+        return error.value
+    
+    error = asyncio.run(scenario())
+    assert error.status_code == 429
+    assert error.headers["Retry-After"] == "10"
+    assert limiter.stats()["allowed"] == 2
+    assert limiter.stats()["limited"] == 1
+
+
+def test_disabled_limiter_never_rejects():
+    """Test a limiter with a zero rate lets every request through"""
+    limiter = RateLimiter(InMemoryLimiterBackend(), "test", rate=0, burst=1)
+    for _ in range(5):
+        asyncio.run(limiter.check(1))
+    assert limiter.stats()["allowed"] == 0
+
+
+@pytest.fixture
+def limits(monkeypatch):
+    """Swap in tight limits with fresh buckets"""
+    def set_limits(limiter, rate, burst):
+        monkeypatch.setattr(limiter, "backend", InMemoryLimiterBackend())
+        monkeypatch.setattr(limiter, "rate", rate)
+        monkeypatch.setattr(limiter, "burst", burst)
+    return set_limits
+
+
+def test_note_routes_limited_per_user(client, auth_headers, limits):
+    """Test note routes return 429 once the user's bucket is empty"""
+    limits(rate_limit.user_limiter, rate=0.01, burst=2)
+    
+    assert client.get("/notes/", headers=auth_headers).status_code == 200
+    assert client.get("/notes/?search=x", headers=auth_headers).status_code == 200
+    response = client.get("/notes/", headers=auth_headers)
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    # Unauthenticated requests are rejected before they take a token
+    assert client.get("/notes/").status_code in (401, 403)
+
+
+def test_auth_routes_limited_per_ip(client, limits):
+    """Test auth routes return 429 once the client IP's bucket is empty"""
+    limits(rate_limit.auth_ip_limiter, rate=0.01, burst=1)
+    
+    credentials = {"username": "admin", "password": "wrong"}
+    assert client.post("/auth/token", json=credentials).status_code == 401
+    response = client.post("/auth/token", json=credentials)
+    assert response.status_code == 429
+    assert "Retry-After" in response.headers
+    assert client.get("/livez").status_code == 200
@@ -0,0 +1,35 @@
+"""
+Read-replica routing tests
+"""
+
+from src.replicas import ReplicaRouter
+
+
+def test_round_robin_ejection_and_pinning(tmp_path):
+    """Test replica selection skips ejected replicas and pinned users"""
+    router = ReplicaRouter(
+        [f"sqlite+aiosqlite:///{tmp_path / 'r0.db'}", f"sqlite+aiosqlite:///{tmp_path / 'r1.db'}"],
+        eject_seconds=60,
+        pin_seconds=60
+    )
+    first, second = router.replicas
+    
+    assert [router.choose(), router.choose(), router.choose()] == [first, second, first]
+    
+    router.eject(second, OSError("connection refused"))
+    assert [router.choose(), router.choose()] == [first, first]
+    
+    router.pin(42)
+    assert router.choose(42) is None
+    assert router.choose(7) is first
+    
+    router.eject(first, OSError("connection refused"))
+    assert router.choose() is None
+
+
+def test_no_replicas_reads_from_primary():
+    """Test that without replicas every read goes to the primary"""
+    router = ReplicaRouter([])
+    router.pin(1)
+    assert router.choose(1) is None
+    assert router.stats()["replicas"] == []
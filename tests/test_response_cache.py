@@ -0,0 +1,95 @@
+"""
+Note list response cache tests
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+from src import cache as cache_module
+from src import response_cache as response_cache_module
+from src.response_cache import InMemoryCacheBackend, RedisCacheBackend, ResponseCache, response_cache
+
+
+class FakeRedis:
+    """Minimal in-memory stand-in for a redis.asyncio client"""
+    
+    def __init__(self):
+        self.data = {}
+    
+    async def get(self, key):
+        return self.data.get(key)
+    
+    async def set(self, key, value, px=None):
+        self.data[key] = value
+    
+    async def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, 0)) + 1).encode()
+        return int(self.data[key])
+
+
+def test_generation_bump_invalidates_user_pages():
+    """Test that invalidating one user leaves other users' pages cached"""
+    cache = ResponseCache(RedisCacheBackend(FakeRedis()), ttl=60)
+    
+    async def scenario():
+        key, value = await cache.get(1, (1, None, 10, None))
+        assert value is None
+        await cache.set(key, b"page-for-user-1")
+        other_key, _ = await cache.get(2, (1, None, 10, None))
+        await cache.set(other_key, b"page-for-user-2")
+        
+        assert (await cache.get(1, (1, None, 10, None)))[1] == b"page-for-user-1"
+        await cache.invalidate(1)
+        assert (await cache.get(1, (1, None, 10, None)))[1] is None
+        assert (await cache.get(2, (1, None, 10, None)))[1] == b"page-for-user-2"
+    
+    asyncio.run(scenario())
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 3
+
+
+def test_memory_generations_are_dropped_without_reviving_old_pages(monkeypatch):
+    """Test generations are kept for one TTL only and a dropped one never exposes an older page"""
+    now = [0.0]
+    clock = SimpleNamespace(monotonic=lambda: now[0])
+    monkeypatch.setattr(cache_module, "time", clock)
+    monkeypatch.setattr(response_cache_module, "time", clock)
+    backend = InMemoryCacheBackend(max_entries=100, ttl=60)
+    cache = ResponseCache(backend, ttl=60)
+    params = (1, None, 10, None)
+    
+    async def scenario():
+        key, _ = await cache.get(1, params)
+        await cache.set(key, b"before-write")
+        now[0] = 1
+        await cache.invalidate(1)
+        assert (await cache.get(1, params))[1] is None
+        
+        for user_id in range(2, 50):
+            await cache.invalidate(user_id)
+        assert len(backend.counters) == 49
+        
+        # One TTL after the bumps the pages they hid have expired too
+        now[0] = 62
+        await cache.invalidate(50)
+        assert list(backend.counters) == [cache._generation_key(50)]
+        assert (await cache.get(1, params))[1] is None
+    
+    asyncio.run(scenario())
+
+
+def test_list_page_served_from_cache(client, auth_headers, count_queries):
+    """Test repeated list polls skip the database until the user writes"""
+    
+    first = client.get("/notes/?limit=3", headers=auth_headers)
+    hits = response_cache.hits
+    with count_queries() as statements:
+        second = client.get("/notes/?limit=3", headers=auth_headers)
+    assert statements == []
+    assert response_cache.hits == hits + 1
+    assert second.content == first.content
+    assert second.headers["ETag"] == first.headers["ETag"]
+    
+    client.post("/notes/", json={"title": "Bumps generation"}, headers=auth_headers)
+    third = client.get("/notes/?limit=3", headers=auth_headers)
+    assert third.json()["items"][0]["title"] == "Bumps generation"
@@ -0,0 +1,42 @@
+"""
+Fast serialization tests
+"""
+
+from datetime import datetime
+
+from fastapi.encoders import jsonable_encoder
+
+from src.schemas import NoteListItem, NoteResponse, PaginatedResponse
+from src.serialization import compile_serializer, field_names, render_json
+
+
+def sample_items():
+    """Rows covering unicode, escapes, nulls and search fields"""
+    return [
+        ("Título \"quoted\"", "línea\n<b>tab\t</b> ✓", 1, 7,
+         datetime(2024, 1, 2, 3, 4, 5, 678901), datetime(2024, 1, 2, 3, 4, 5), None, None),
+        ("Plain", None, 2, 7,
+         datetime(2024, 1, 1), datetime(2024, 1, 1, 0, 0, 0, 1), 0.0333333, "a <mark>hit</mark>"),
+    ]
+
+
+def test_fast_page_matches_default_json():
+    """Test the compiled page serializer renders the same bytes as FastAPI"""
+    items = sample_items()
+    model = PaginatedResponse(
+        items=[NoteListItem(**dict(zip(field_names(NoteListItem), values))) for values in items],
+        total=2, page=1, limit=10, pages=1, next_cursor=None
+    )
+    
+    fast = compile_serializer(PaginatedResponse)((items, 2, 1, 10, 1, None)).encode()
+    
+    assert fast == render_json(jsonable_encoder(model))
+    assert fast == render_json(model.model_dump(mode="json"))
+
+
+def test_fast_note_matches_default_json():
+    """Test the compiled note serializer renders the same bytes as FastAPI"""
+    values = sample_items()[0][:6]
+    model = NoteResponse(**dict(zip(field_names(NoteResponse), values)))
+    
+    assert compile_serializer(NoteResponse)(values).encode() == render_json(jsonable_encoder(model))
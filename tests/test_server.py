@@ -0,0 +1,142 @@
+"""
+Tests for the app factory, per-process engine lifecycle and the launcher
+"""
+
+import asyncio
+import os
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+import src.main as main_module
+from src import database, server
+from src.main import create_app
+
+
+def test_create_app_builds_independent_apps():
+    """Test each call builds a fresh app with every route"""
+    first, second = create_app(), create_app()
+    assert first is not second
+    paths = {route.path for route in first.routes}
+    assert {"/health", "/metrics", "/", "/notes/", "/auth/token"} <= paths
+    assert "/metrics" not in TestClient(first).get("/openapi.json").json()["paths"]
+
+
+def test_lifespan_creates_and_disposes_engine():
+    """Test the engine is created at startup and disposed at shutdown"""
+    asyncio.run(database.dispose_engine())
+    assert database.engine is None
+
+    with TestClient(create_app()) as client:
+        assert database.engine is not None
+        assert client.get("/health").json()["status"] == "ok"
+
+    assert database.engine is None
+
+
+def test_dispose_engine_waits_for_checked_out_connections():
+    """Test disposal waits for checked-out connections to come back"""
+    async def scenario():
+        engine = database.get_engine()
+        conn = await engine.connect()
+        await conn.execute(text("SELECT 1"))
+
+        async def release():
+            await asyncio.sleep(0.2)
+            await conn.close()
+
+        started = time.monotonic()
+        await asyncio.gather(release(), database.dispose_engine(drain_timeout=5))
+        return engine, time.monotonic() - started
+
+    engine, elapsed = asyncio.run(scenario())
+    assert 0.2 <= elapsed < 5
+    assert database.engine is None
+    # The next caller gets a fresh engine, and sessions follow it
+    assert database.get_engine() is not engine
+    assert database.AsyncSessionLocal.kw["bind"] is database.engine
+
+
+def test_dispose_engine_gives_up_after_drain_timeout():
+    """Test disposal stops waiting after the drain timeout"""
+    async def scenario():
+        conn = await database.get_engine().connect()
+        started = time.monotonic()
+        await database.dispose_engine(drain_timeout=0.1)
+        elapsed = time.monotonic() - started
+        await conn.close()
+        return elapsed
+
+    assert asyncio.run(scenario()) < 1
+    assert database.engine is None
+
+
+@pytest.fixture
+def uvicorn_run(monkeypatch):
+    """Capture uvicorn.run calls instead of starting a server"""
+    calls = []
+    monkeypatch.setattr(server.uvicorn, "run", lambda *args, **kwargs: calls.append((args, kwargs)))
+    # Keep the overrides meant for workers out of the test process
+    monkeypatch.setattr(os, "environ", os.environ.copy())
+    return calls
+
+
+def test_launcher_defaults_to_one_worker_per_cpu(uvicorn_run, monkeypatch):
+    """Test the factory is launched with one worker per CPU by default"""
+    monkeypatch.setattr(server.settings, "workers", 0)
+    server.main([])
+
+    (args, kwargs), = uvicorn_run
+    assert args == ("src.main:create_app",)
+    assert kwargs["factory"] is True
+    assert kwargs["workers"] == (os.cpu_count() or 1)
+    assert kwargs["port"] == server.settings.port
+    assert kwargs["timeout_graceful_shutdown"] == server.settings.graceful_shutdown_seconds
+    assert kwargs["proxy_headers"] is True
+    assert kwargs["forwarded_allow_ips"] == server.settings.forwarded_allow_ips
+
+
+def test_launcher_worker_count_overrides(uvicorn_run, monkeypatch):
+    """Test WORKERS and --workers override the default"""
+    monkeypatch.setattr(server.settings, "workers", 3)
+    server.main([])
+    server.main(["--workers", "2", "--port", "8080"])
+
+    assert uvicorn_run[0][1]["workers"] == 3
+    assert uvicorn_run[1][1]["workers"] == 2
+    assert uvicorn_run[1][1]["port"] == 8080
+
+
+def test_launcher_turns_off_memory_page_cache_for_several_workers(uvicorn_run, monkeypatch):
+    """Test workers inherit a disabled memory page cache, while one worker or Redis keeps it"""
+    monkeypatch.setattr(server.settings, "response_cache_backend", "memory")
+    monkeypatch.setattr(server.settings, "response_cache_ttl_seconds", 60.0)
+    server.main(["--workers", "1"])
+    assert "RESPONSE_CACHE_TTL_SECONDS" not in os.environ
+
+    monkeypatch.setattr(server.settings, "response_cache_backend", "redis")
+    server.main(["--workers", "2"])
+    assert "RESPONSE_CACHE_TTL_SECONDS" not in os.environ
+
+    monkeypatch.setattr(server.settings, "response_cache_backend", "memory")
+    server.main(["--workers", "2"])
+    assert os.environ["RESPONSE_CACHE_TTL_SECONDS"] == "0"
+    assert [kwargs["workers"] for _, kwargs in uvicorn_run] == [1, 2, 2]
+
+
+def test_module_app_is_built_on_first_access(monkeypatch):
+    """Test importing src.main builds no app; `src.main:app` builds one, once"""
+    built = []
+
+    def create_app_once():
+        built.append(object())
+        return built[-1]
+
+    monkeypatch.delitem(vars(main_module), "app", raising=False)
+    monkeypatch.setattr(main_module, "create_app", create_app_once)
+
+    assert "app" not in vars(main_module)
+    assert main_module.app is main_module.app
+    assert len(built) == 1
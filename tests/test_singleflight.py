@@ -0,0 +1,163 @@
+"""
+Request coalescing tests
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from src.main import app
+from src.metrics import registry
+from src.routes import notes as notes_routes
+from src.singleflight import SingleFlight
+
+
+def test_concurrent_callers_share_one_execution():
+    """Test identical keys run once while different keys run separately"""
+    flight = SingleFlight("test")
+    calls = []
+    
+    async def load(value):
+        calls.append(value)
+        await asyncio.sleep(0.05)
+        return value * 2
+    
+    async def scenario():
+        return await asyncio.gather(
+            *(flight.do("a", lambda: load(1)) for _ in range(5)),
+            flight.do("b", lambda: load(10)),
+        )
+    
+    assert asyncio.run(scenario()) == [2, 2, 2, 2, 2, 20]
+    assert calls == [1, 10]
+    assert flight.stats() == {"in_flight": 0, "executions": 2, "coalesced": 4}
+    
+    # Nothing is cached once the execution finished
+    asyncio.run(flight.do("a", lambda: load(1)))
+    assert calls == [1, 10, 1]
+
+
+def test_errors_reach_every_caller_and_release_the_key():
+    """Test an error is raised to every waiter and the key is freed for a retry"""
+    flight = SingleFlight("test")
+    
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+    
+    async def scenario():
+        return await asyncio.gather(*(flight.do("k", fail) for _ in range(3)), return_exceptions=True)
+    
+    results = asyncio.run(scenario())
+    assert all(isinstance(result, ValueError) for result in results)
+    assert len(flight) == 0
+
+
+def test_cancelled_caller_does_not_cancel_the_others():
+    """Test cancelling one waiter leaves the shared execution running for the rest"""
+    flight = SingleFlight("test")
+    
+    async def load():
+        await asyncio.sleep(0.05)
+        return "done"
+    
+    async def scenario():
+        first = asyncio.ensure_future(flight.do("k", load))
+        second = asyncio.ensure_future(flight.do("k", load))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        return await second, first.cancelled()
+    
+    assert asyncio.run(scenario()) == ("done", True)
+
+
+def test_forget_starts_fresh_executions():
+    """Test forgotten keys start a new execution while old waiters keep theirs"""
+    flight = SingleFlight("test")
+    calls = []
+    
+    async def load(value):
+        calls.append(value)
+        await asyncio.sleep(0.05)
+        return value
+    
+    async def scenario():
+        before = asyncio.ensure_future(flight.do((1, "page"), lambda: load("old")))
+        await asyncio.sleep(0.01)
+        flight.forget(lambda key: key[0] == 1)
+        after = await flight.do((1, "page"), lambda: load("new"))
+        return await before, after
+    
+    assert asyncio.run(scenario()) == ("old", "new")
+    assert calls == ["old", "new"]
+
+
+def test_disabled_flight_runs_every_call():
+    """Test a disabled flight runs every call on its own"""
+    flight = SingleFlight("test", enabled=False)
+    calls = []
+    
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+    
+    async def scenario():
+        await asyncio.gather(*(flight.do("k", load) for _ in range(3)))
+    
+    asyncio.run(scenario())
+    assert len(calls) == 3
+
+
+@pytest.mark.parametrize("path", ["/notes/?limit=5", "/notes/{note_id}"])
+def test_identical_concurrent_reads_run_one_query(path, auth_headers, count_queries, monkeypatch):
+    """Test concurrent identical requests get the same response from one DB execution"""
+    monkeypatch.setattr(notes_routes.response_cache, "ttl", 0)
+    flight = notes_routes.list_flight if path.startswith("/notes/?") else notes_routes.note_flight
+    requests = 4
+    
+    # Hold the shared execution until every request has joined it
+    gate = asyncio.Event()
+    original = notes_routes.read_session
+    
+    def gated_read_session(user_id=None):
+        session = original(user_id)
+        
+        class Gated:
+            async def __aenter__(self):
+                await gate.wait()
+                return await session.__aenter__()
+            
+            async def __aexit__(self, *exc_info):
+                return await session.__aexit__(*exc_info)
+        return Gated()
+    
+    monkeypatch.setattr(notes_routes, "read_session", gated_read_session)
+    
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            note = (await client.post(
+                "/notes/", json={"title": "Coalesced", "content": "x"}, headers=auth_headers
+            )).json()
+            url = path.format(note_id=note["id"])
+            
+            coalesced = flight.coalesced
+            with count_queries() as statements:
+                pending = [asyncio.ensure_future(client.get(url, headers=auth_headers)) for _ in range(requests)]
+                while flight.coalesced - coalesced < requests - 1:
+                    await asyncio.sleep(0.005)
+                gate.set()
+                responses = await asyncio.gather(*pending)
+            return responses, statements
+    
+    responses, statements = asyncio.run(scenario())
+    assert [response.status_code for response in responses] == [200] * requests
+    assert len({response.content for response in responses}) == 1
+    assert len({response.headers["etag"] for response in responses}) == 1
+    # Every request, not just the one that ran the query, reports it in Server-Timing
+    assert all('desc="0 queries"' not in response.headers["server-timing"] for response in responses)
+    # One execution: the page count and rows, or the single note lookup
+    notes_selects = [statement for statement in statements if "FROM notes" in statement]
+    assert len(notes_selects) == (2 if flight is notes_routes.list_flight else 1)
+    assert f'coalesced_requests_total{{flight="{flight.name}"}}' in registry.render().decode()